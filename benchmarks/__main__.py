@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import logging
+from datetime import datetime
+from discord.app_commands import Choice
+import config
+from commands.backup import BackupCog
+from commands.analyzer import MessageAnalyzer
+from services.rcon_pool import RconPool
+from services.server_status import ServerStatusService
+from services.minecraft_service import MinecraftLogWatcher
+from benchmarks.fakes import FakeBot, FakeChannel, FakeInteraction
+from benchmarks.fake_rcon import FakeRconServer
+from benchmarks.log_writer import write_log, append_log, generate_lines
+
+ANALYSIS_TYPES = ("message_count", "time_activity", "activity_chart", "word_count")
+SUITES = ("backup", "analyze", "log", "rcon")
+TAIL_CHUNK = 50  # Lines the server writes between two polls of the log watcher
+WARMUP_SCALE = 1000  # Messages and log lines of the untimed warm-up pass
+
+
+def parse_scale(text):
+    text = text.lower()
+    factor = {"k": 1000, "m": 1000000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+
+# Every scale gets its own channel, and with it its own backup
+def scale_channel(count):
+    return FakeChannel(count, channel_id=1234567890 + count)
+
+
+class Runner:
+    def __init__(self, repeat=3, memory=False, quiet=False):
+        self.repeat = repeat
+        self.memory = memory
+        self.quiet = quiet
+        self.results = {}
+
+    # Runs the benchmark `repeat` times and keeps the fastest run. `run` returns the
+    # number of items processed and optionally a dict of extra numbers.
+    async def measure(self, name, run):
+        best = None
+        for _ in range(self.repeat):
+            if self.memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            outcome = await run()
+            seconds = time.perf_counter() - start
+            items, extra = outcome if isinstance(outcome, tuple) else (outcome, {})
+            result = {"seconds": seconds, "items": items, **extra}
+            result["per_second"] = items / seconds if seconds else None
+            if self.memory:
+                result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                tracemalloc.stop()
+            if best is None or seconds < best["seconds"]:
+                best = result
+
+        self.results[name] = best
+        if self.quiet:
+            return best
+        memory = f" {best['peak_mb']:8.1f} MB" if self.memory else ""
+        print(
+            f"{name:48} {best['seconds'] * 1000:10.1f} ms "
+            f"{best['per_second'] or 0:12.0f}/s{memory}"
+        )
+        return best
+
+
+async def run_backup(channel):
+    cog = BackupCog(None)
+    await BackupCog.backup.callback(cog, FakeInteraction(channel))
+    return channel.num_messages
+
+
+def backup_size(channel):
+    folder = f"{config.BACKUP_PATH}/{channel.id}"
+    files = [f for f in os.listdir(folder) if f.endswith(".json")]
+    return os.path.getsize(os.path.join(folder, max(files))) / 1024 / 1024
+
+
+async def bench_backup(runner, label, count):
+    channel = scale_channel(count)
+    result = await runner.measure(f"backup[{label}]", lambda: run_backup(channel))
+    result["file_mb"] = backup_size(channel)
+
+
+async def bench_analyze(runner, label, count):
+    channel = scale_channel(count)
+    if not os.path.exists(f"{config.BACKUP_PATH}/{channel.id}"):
+        await run_backup(channel)  # Untimed, only needed for the backup source
+
+    cog = MessageAnalyzer(None)
+    for analysis_type in ANALYSIS_TYPES:
+        for source, use_backup in (("history", False), ("backup", True)):
+
+            async def run():
+                await MessageAnalyzer.analyze.callback(
+                    cog,
+                    FakeInteraction(channel),
+                    Choice(name=analysis_type, value=analysis_type),
+                    search_term="creeper",
+                    use_backup=use_backup,
+                    ephemeral=True,
+                )
+                return count
+
+            await runner.measure(f"analyze[{analysis_type},{source}][{label}]", run)
+
+
+def create_log_watcher(path):
+    config.LOG_FILE_PATH = path
+    channel = FakeChannel(0)
+    bot = FakeBot(channel, asyncio.get_running_loop())
+    bot.services.create([RconPool, ServerStatusService, MinecraftLogWatcher])
+    watcher = bot.services.get(MinecraftLogWatcher)
+    watcher.initial_load = False
+    watcher.debounce_time = 3600  # Presence updates are not part of the benchmark
+    return watcher, channel
+
+
+async def bench_log_watcher(runner, label, count, folder):
+    # Catching up on a flood: one poll finds the whole file new
+    path = os.path.join(folder, "bulk.log")
+    write_log(path, count)
+    watcher, channel = create_log_watcher(path)
+    watcher.last_known_size = 0
+
+    async def run_bulk():
+        watcher.last_known_size = 0
+        await watcher.watch_log()
+        await watcher.flush_buffer()
+        return count, {"messages_sent": len(channel.sent)}
+
+    await runner.measure(f"log_watcher[bulk][{label}]", run_bulk)
+    if watcher.debounce_task:
+        watcher.debounce_task.cancel()
+
+    # Steady state: the server writes a few lines between every poll
+    path = os.path.join(folder, "tail.log")
+    lines = list(generate_lines(count, seed=1))
+
+    async def run_tail():
+        open(path, "w").close()
+        watcher, channel = create_log_watcher(path)
+        for start in range(0, len(lines), TAIL_CHUNK):
+            append_log(path, lines[start : start + TAIL_CHUNK])
+            await watcher.watch_log()
+            await watcher.flush_buffer()
+        if watcher.debounce_task:
+            watcher.debounce_task.cancel()
+        polls = -(-len(lines) // TAIL_CHUNK)
+        return count, {"polls": polls, "messages_sent": len(channel.sent)}
+
+    result = await runner.measure(f"log_watcher[tail][{label}]", run_tail)
+    result["ms_per_poll"] = result["seconds"] * 1000 / result["polls"]
+
+
+async def bench_rcon(runner, requests=2000, concurrency=16):
+    server = FakeRconServer()
+    await server.start()
+    config.RCON_IP = "127.0.0.1"
+    config.RCON_PORT = server.port
+    config.RCON_PASSWORD = server.password
+    pool = RconPool(FakeBot())
+    await pool.command("list")  # Connect outside of the measurement
+
+    async def run_sequential(command, count):
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            await pool.command(command)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        return count, {
+            f"p{p}_ms": latencies[min(int(p / 100 * count), count - 1)] * 1000
+            for p in (50, 95, 99)
+        }
+
+    async def run_concurrent():
+        per_task = requests // concurrency
+
+        async def worker():
+            for _ in range(per_task):
+                await pool.command("list")
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return per_task * concurrency
+
+    await runner.measure("rcon[list]", lambda: run_sequential("list", requests))
+    await runner.measure("rcon[help]", lambda: run_sequential("help", requests // 10))
+    await runner.measure(f"rcon[concurrent x{concurrency}]", run_concurrent)
+    await pool.stop()
+    await server.stop()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Prints the change against a previous run, returns the names of the regressions
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(
+        f"\nCompared to {baseline_path} ({baseline.get('commit') or 'unknown commit'}):"
+    )
+
+    regressions = []
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        change = result["seconds"] / old["seconds"] - 1
+        mark = ""
+        if change > threshold:
+            mark = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:48} {old['seconds'] * 1000:10.1f} -> "
+            f"{result['seconds'] * 1000:10.1f} ms {change:+8.1%}{mark}"
+        )
+    return regressions
+
+
+async def run_suites(runner, args, scales, folder):
+    for text in scales:
+        count = parse_scale(text)
+        if "backup" in args.only:
+            await bench_backup(runner, text, count)
+        if "analyze" in args.only:
+            await bench_analyze(runner, text, count)
+        if "log" in args.only:
+            await bench_log_watcher(runner, text, count, folder)
+    if "rcon" in args.only:
+        await bench_rcon(runner)
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as folder:
+        config.BACKUP_PATH = os.path.join(folder, "backups")
+        # Imports, matplotlib's font cache and the like would otherwise be timed in
+        # whichever benchmark happens to run first
+        warmup = Runner(repeat=1, quiet=True)
+        await run_suites(warmup, args, [str(WARMUP_SCALE)], folder)
+
+        runner = Runner(repeat=args.repeat, memory=args.memory)
+        await run_suites(runner, args, args.scales, folder)
+    return runner.results
+
+
+# Benchmark: python -m benchmarks [--scales 10k 100k 1M] [--compare <results file>]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the hot paths")
+    parser.add_argument("--scales", nargs="+", default=["10k", "100k"])
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--repeat", type=int, default=3, help="Keep the best of n runs")
+    parser.add_argument(
+        "--memory", action="store_true", help="Track peak memory (slow)"
+    )
+    parser.add_argument("--output", help="Results file (default: in BENCHMARK_PATH)")
+    parser.add_argument("--compare", help="Results file of an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Slowdown counted as regression"
+    )
+    args = parser.parse_args()
+
+    # The log watcher reports every poll at INFO level
+    logging.disable(logging.INFO)
+    results = asyncio.run(main(args))
+
+    output = args.output or os.path.join(
+        config.BENCHMARK_PATH, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "created": datetime.now().isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "scales": args.scales,
+                "results": results,
+            },
+            f,
+            indent=4,
+        )
+    print(f"\nResults saved to {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,79 @@
+import asyncio
+import struct
+from services.rcon_pool import LOGIN_TYPE, COMMAND_TYPE
+
+RESPONSE_TYPE = 0
+# Minecraft splits responses into packets with at most this many payload bytes
+MAX_PAYLOAD_SIZE = 4096
+AUTH_FAILED_ID = -1
+
+
+class FakeRconServer:
+    # Local stand-in for Minecraft's RCON listener. It answers "list" like a server
+    # with a few players, "help" with a response long enough to be split into
+    # several packets, and echoes everything else. `delay` simulates the server tick.
+    def __init__(self, password="benchmark", delay=0.0, players=("Steve", "Alex")):
+        self.password = password
+        self.delay = delay
+        self.players = players
+        self.server = None
+        self.port = None
+        self.commands = 0  # Commands answered so far
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def respond(self, command):
+        if command == "list":
+            return (
+                f"There are {len(self.players)} of a max of 20 players online: "
+                + ", ".join(self.players)
+            )
+        if command == "help":
+            return "\n".join(f"/command{i} <arguments>" for i in range(1000))
+        return f"Executed {command}"
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                (length,) = struct.unpack("<i", await reader.readexactly(4))
+                data = await reader.readexactly(length)
+                request_id, packet_type = struct.unpack("<ii", data[:8])
+                payload = data[8:-2].decode("utf-8")
+
+                if packet_type == LOGIN_TYPE:
+                    ok = payload == self.password
+                    self.write(writer, request_id if ok else AUTH_FAILED_ID, "")
+                elif packet_type != COMMAND_TYPE:
+                    # Like Minecraft, clients use this to find the end of a response
+                    self.write(writer, request_id, f"Unknown request {packet_type:x}")
+                else:
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    self.commands += 1
+                    response = self.respond(payload).encode("utf-8")
+                    # Split like Minecraft does, every packet but the last one is full
+                    for start in range(0, len(response) or 1, MAX_PAYLOAD_SIZE):
+                        chunk = response[start : start + MAX_PAYLOAD_SIZE]
+                        self.write(writer, request_id, chunk.decode("utf-8"))
+                await writer.drain()
+        # Cancelled when the benchmark shuts down with connections still open
+        except (
+            asyncio.IncompleteReadError,
+            ConnectionResetError,
+            asyncio.CancelledError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def write(writer, request_id, payload):
+        data = struct.pack("<ii", request_id, RESPONSE_TYPE) + payload.encode("utf-8")
+        data += b"\x00\x00"
+        writer.write(struct.pack("<i", len(data)) + data)
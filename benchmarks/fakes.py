@@ -0,0 +1,209 @@
+import random
+from datetime import datetime, timedelta, timezone
+import discord
+from service_registry import ServiceRegistry
+
+WORDS = (
+    "the a minecraft server creeper diamond lol ok yes no tonight who is online "
+    "build farm nether end base raid village update restart lag ping gg nice"
+).split()
+
+
+class FakeAsset:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeUser:
+    # The attributes of discord.User that the backup and the analyzer read
+    def __init__(self, user_id, name):
+        self.id = user_id
+        self.name = name
+        self.global_name = name.title()
+        self.display_name = self.global_name
+        self.discriminator = "0"
+        self.avatar = FakeAsset(f"https://cdn.discordapp.com/avatars/{user_id}/a.png")
+        self.display_avatar = self.avatar
+        self.bot = False
+        self.system = False
+        self.mention = f"<@{user_id}>"
+        self.public_flags = discord.PublicUserFlags()
+        self.banner = None
+        self.accent_color = None
+        self.color = discord.Colour.default()
+        self.created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.avatar_decoration = None
+        self.avatar_decoration_sku_id = None
+
+
+class FakeAttachment:
+    def __init__(self, attachment_id, filename):
+        self.id = attachment_id
+        self.filename = filename
+        self.url = (
+            f"https://cdn.discordapp.com/attachments/1/{attachment_id}/{filename}"
+        )
+
+    def is_spoiler(self):
+        return False
+
+
+class FakeReaction:
+    def __init__(self, emoji, users):
+        self.emoji = emoji
+        self._users = users
+
+    async def users(self):
+        for user in self._users:
+            yield user
+
+
+class FakeReference:
+    def __init__(self, message_id, channel_id):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.guild_id = None
+        self.fail_if_not_exists = True
+
+
+class FakeMessage:
+    # Mimics discord.Message closely enough for /backup and /analyze. The optional
+    # parts default to what discord.py has for a plain text message.
+    edited_at = None
+    reference = None
+    pinned = False
+    poll = None
+    activity = None
+    application = None
+    webhook_id = None
+    mention_everyone = False
+    thread = None
+    interaction_metadata = None
+    type = discord.MessageType.default
+    flags = discord.MessageFlags()
+    mentions = channel_mentions = role_mentions = components = ()
+    stickers = reactions = attachments = embeds = ()
+
+    def __init__(self, message_id, author, content, created_at):
+        self.id = message_id
+        self.author = author
+        self.content = content
+        self.created_at = created_at
+
+    @property
+    def clean_content(self):
+        return self.content
+
+    def is_system(self):
+        return False
+
+    async def edit(self, **kwargs):
+        pass
+
+
+# Deterministic messages, newest first like channel.history(). The mix of replies,
+# edits, mentions, reactions, attachments and embeds roughly follows a gaming server.
+def generate_messages(count, channel_id, num_users=50, seed=0):
+    rng = random.Random(seed)
+    users = [FakeUser(10**17 + i, f"user{i}") for i in range(num_users)]
+    created_at = datetime(2024, 10, 25, 23, 34, 25, tzinfo=timezone.utc)
+    for _ in range(count):
+        created_at -= timedelta(seconds=rng.randint(1, 600))
+        author = rng.choice(users)
+        content = " ".join(rng.choices(WORDS, k=rng.randint(1, 20)))
+        message_id = discord.utils.time_snowflake(created_at) + rng.randint(0, 4095)
+        message = FakeMessage(message_id, author, content, created_at)
+
+        roll = rng.random()
+        if roll < 0.10:
+            message.reference = FakeReference(message_id - 1000, channel_id)
+        if roll < 0.05:
+            message.mentions = [rng.choice(users)]
+        if rng.random() < 0.10:
+            message.edited_at = created_at + timedelta(minutes=1)
+        if rng.random() < 0.05:
+            message.reactions = [FakeReaction("👍", rng.sample(users, 3))]
+        if rng.random() < 0.03:
+            message.attachments = [FakeAttachment(message_id, "screenshot.png")]
+        if rng.random() < 0.02:
+            message.embeds = [
+                discord.Embed(
+                    title="Link", url="https://example.com", description=content
+                )
+            ]
+        yield message
+
+
+class FakeCategory:
+    name = "Benchmark"
+
+
+class FakeChannel:
+    # Text channel whose history is generated on the fly, so a million messages
+    # never have to be held in memory at once
+    type = discord.ChannelType.text
+    guild = None
+    topic = None
+    nsfw = False
+    category_id = parent_id = 1111
+    category = FakeCategory()
+
+    def __init__(self, num_messages, channel_id=1234567890, seed=0):
+        self.id = channel_id
+        self.name = "benchmark"
+        self.mention = f"<#{channel_id}>"
+        self.jump_url = f"https://discord.com/channels/@me/{channel_id}"
+        self.created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.num_messages = num_messages
+        self.seed = seed
+        self.sent = []  # Everything passed to send()
+
+    async def history(self, limit=100):
+        messages = generate_messages(
+            min(limit or self.num_messages, self.num_messages), self.id, seed=self.seed
+        )
+        for message in messages:
+            yield message
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+        return FakeMessage(0, None, content, datetime.now(timezone.utc))
+
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, content=None, **kwargs):
+        pass
+
+
+class FakeFollowup:
+    async def send(self, content=None, **kwargs):
+        return FakeMessage(1, None, content, datetime.now(timezone.utc))
+
+
+class FakeInteraction:
+    def __init__(self, channel):
+        self.channel = channel
+        self.guild = None
+        self.user = FakeUser(1, "benchmark")
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    async def edit_original_response(self, **kwargs):
+        pass
+
+
+class FakeBot:
+    # Enough of commands.Bot for the services: the registry, channels and the loop
+    def __init__(self, channel=None, loop=None):
+        self.channel = channel
+        self.loop = loop
+        self.services = ServiceRegistry(self)
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+    async def wait_until_ready(self):
+        pass
@@ -0,0 +1,54 @@
+import random
+from datetime import datetime, timedelta
+
+PLAYERS = ["Steve", "Alex", "Notch", "Herobrine", "Jeb_", "Dinnerbone"]
+
+
+# Synthetic lines in the vanilla latest.log format. Mostly chat and server noise,
+# with joins/leaves, RCON chatter (filtered by the watcher) and blank lines mixed in.
+def generate_lines(count, seed=0):
+    rng = random.Random(seed)
+    time = datetime(2024, 10, 25, 20, 0, 0)
+    for _ in range(count):
+        time += timedelta(milliseconds=rng.randint(0, 2000))
+        prefix = f"[{time.strftime('%H:%M:%S')}]"
+        player = rng.choice(PLAYERS)
+        roll = rng.random()
+        if roll < 0.40:
+            words = rng.randint(1, 15)
+            line = f"{prefix} [Server thread/INFO]: <{player}> {'hello ' * words}"
+        elif roll < 0.50:
+            event = rng.choice(("joined", "left"))
+            line = f"{prefix} [Server thread/INFO]: {player} {event} the game"
+        elif roll < 0.65:
+            line = f"{prefix} [RCON Listener #1/INFO]: Thread RCON Client /127.0.0.1 started"
+        elif roll < 0.70:
+            line = ""
+        elif roll < 0.80:
+            line = (
+                f"{prefix} [Server thread/WARN]: Can't keep up! Is the server "
+                f"overloaded? Running {rng.randint(2000, 9000)}ms or "
+                f"{rng.randint(40, 180)} ticks behind"
+            )
+        else:
+            x, y, z = (
+                rng.randint(-5000, 5000),
+                rng.randint(-64, 320),
+                rng.randint(-5000, 5000),
+            )
+            line = (
+                f"{prefix} [Server thread/INFO]: {player} moved too quickly! "
+                f"{x},{y},{z}"
+            )
+        yield line + "\n"
+
+
+def write_log(path, count, seed=0, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.writelines(generate_lines(count, seed))
+
+
+# Appends to the log in chunks, e.g. between polls of the log watcher
+def append_log(path, lines):
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(lines)
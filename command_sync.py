@@ -0,0 +1,57 @@
+import os
+import json
+import hashlib
+import discord
+import config
+
+# Sync target ("global" or a guild id) -> hash of the commands last synced there
+synced_hashes = None
+
+
+# Hash of everything Discord stores about the commands
+def command_tree_hash(tree, guild=None):
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command["type"], command["name"]),
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def load_synced_hashes():
+    global synced_hashes
+    if synced_hashes is None:
+        try:
+            with open(config.COMMAND_HASH_PATH, "r", encoding="utf-8") as f:
+                synced_hashes = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            synced_hashes = {}
+    return synced_hashes
+
+
+def save_synced_hashes():
+    os.makedirs(os.path.dirname(config.COMMAND_HASH_PATH), exist_ok=True)
+    tmp_path = f"{config.COMMAND_HASH_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(synced_hashes, f)
+    os.replace(tmp_path, config.COMMAND_HASH_PATH)
+
+
+# Syncs the commands only if they changed since the last sync, even across restarts.
+# With a guild id the global commands are copied to that guild, which applies
+# instantly instead of taking up to an hour like global commands.
+# Returns the synced commands, or None if nothing had to be synced.
+async def sync_commands(bot, guild_id=None):
+    guild = discord.Object(id=guild_id) if guild_id else None
+    if guild:
+        bot.tree.copy_global_to(guild=guild)
+
+    target = str(guild_id) if guild_id else "global"
+    tree_hash = command_tree_hash(bot.tree, guild)
+    hashes = load_synced_hashes()
+    if hashes.get(target) == tree_hash:
+        return None
+
+    synced = await bot.tree.sync(guild=guild)
+    hashes[target] = tree_hash
+    save_synced_hashes()
+    return synced
@@ -1,18 +1,15 @@
-import json
-import os
 from types import SimpleNamespace
 import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.app_commands import Choice
-import matplotlib.pyplot as plt
 import io
 import pytz
 import config
 from collections import defaultdict, Counter, deque
 from datetime import datetime, timedelta
-import numpy as np
-from commands.backup import CancelButton
+from commands.backup import CancelButton, load_latest_backup
+from services.member_cache import MemberCache
 
 
 class MessageAnalyzer(commands.Cog):
@@ -72,32 +69,17 @@ class MessageAnalyzer(commands.Cog):
 
         start = datetime.now()
 
-        channel_id = interaction.channel.id
-        backup_folder = config.BACKUP_PATH
-        channel_folder = f"{backup_folder}/{channel_id}"
-        if not backup_folder:
-            use_backup = False
-
         messages_deque = deque()
         new_messages_fetched = 0
         backup_timestamp = None
 
-        if use_backup and os.path.exists(channel_folder):
-            backup_files = [
-                f for f in os.listdir(channel_folder) if f.endswith(".json")
-            ]
-            backup_files.sort(reverse=True)
-            for backup_file in backup_files:
-                with open(
-                    f"{channel_folder}/{backup_file}", "r", encoding="utf-8"
-                ) as f:
-                    backup_data = json.load(f)
-                    if backup_data.get("is_complete", False):
-                        messages_deque = deque(
-                            backup_data.get("channel", {}).get("messages", [])
-                        )
-                        backup_timestamp = backup_data.get("backup_date")
-                        break
+        if use_backup:
+            backup_data = load_latest_backup(interaction.channel.id)
+            if backup_data:
+                messages_deque = deque(
+                    backup_data.get("channel", {}).get("messages", [])
+                )
+                backup_timestamp = backup_data.get("backup_date")
             else:
                 use_backup = False
 
@@ -272,6 +254,12 @@ class MessageAnalyzer(commands.Cog):
             view=None,
         )
 
+    # Works without the guild's members cached, see MemberCache
+    async def get_display_name(self, guild, user):
+        member_cache = self.bot.services.get(MemberCache)
+        member = await member_cache.get_member(guild, user.id) if member_cache else None
+        return member.display_name if member else user.name
+
     async def handle_activity_chart(
         self,
         interaction,
@@ -280,11 +268,11 @@ class MessageAnalyzer(commands.Cog):
         user_time_activity,
         total_analyzed_info,
     ):
-        if user:
-            member = interaction.guild.get_member(user.id)
-            display_name = member.display_name if member else user.name
-        else:
-            display_name = "All Users"
+        display_name = (
+            await self.get_display_name(interaction.guild, user)
+            if user
+            else "All Users"
+        )
 
         times = [t for times_list in user_time_activity.values() for t in times_list]
         if not times:
@@ -315,6 +303,9 @@ class MessageAnalyzer(commands.Cog):
 
     def generate_activity_chart(self, timestamps, display_name, total_analyzed_info):
         try:
+            import numpy as np
+            import matplotlib.pyplot as plt
+
             # Sort timestamps by date
             timestamps.sort()
             dates = [t.date() for t in timestamps]
@@ -406,11 +397,11 @@ class MessageAnalyzer(commands.Cog):
         user_time_activity,
         total_analyzed_info,
     ):
-        if user:
-            member = interaction.guild.get_member(user.id)
-            display_name = member.display_name if member else user.name
-        else:
-            display_name = "All Users"
+        display_name = (
+            await self.get_display_name(interaction.guild, user)
+            if user
+            else "All Users"
+        )
 
         times = [t for times_list in user_time_activity.values() for t in times_list]
         if not times:
@@ -480,6 +471,7 @@ class MessageAnalyzer(commands.Cog):
     def generate_heatmap(self, timestamps, title):
         try:
             import numpy as np
+            import matplotlib.pyplot as plt
 
             heatmap_data = np.zeros((7, 24), dtype=int)  # 7 days, 24 hours
 
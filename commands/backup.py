@@ -130,7 +130,7 @@ class BackupCog(commands.Cog):
             users_set = set(channel.recipients)
         else:
             backup_data["channel"].update(get_guild_channel_data(channel))
-            users_set = {member for member in channel.guild.members if channel.guild}
+            # Only the authors of the exported messages are recorded, added below
             # filesize_limit = channel.guild.filesize_limit # gives 25mb even though its 10mb
         if isinstance(channel, discord.Thread):
             backup_data["channel"].update(get_thread_data(channel))
@@ -485,6 +485,21 @@ class BackupCog(commands.Cog):
             )
 
 
+# Latest complete backup of a channel, or None. Its messages are stored newest first
+def load_latest_backup(channel_id):
+    channel_folder = f"{config.BACKUP_PATH}/{channel_id}"
+    if not config.BACKUP_PATH or not os.path.exists(channel_folder):
+        return None
+
+    backup_files = [f for f in os.listdir(channel_folder) if f.endswith(".json")]
+    for backup_file in sorted(backup_files, reverse=True):
+        with open(f"{channel_folder}/{backup_file}", "r", encoding="utf-8") as f:
+            backup_data = json.load(f)
+        if backup_data.get("is_complete", False):
+            return backup_data
+    return None
+
+
 class CancelButton(discord.ui.View):
     def __init__(self, parent, interaction, timeout=60):
         super().__init__(timeout=timeout)
@@ -1,10 +1,156 @@
-from datetime import timezone
+import re
+import time
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone, timedelta
 import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.app_commands import Choice
 import pytz
 import config
+from commands.backup import load_latest_backup
+
+# Discord only bulk-deletes messages younger than 14 days, a bit of margin for slow runs
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_BATCH = 100
+SINGLE_DELETE_CONCURRENCY = 5  # Older messages are deleted one request each
+PROGRESS_INTERVAL = 2  # Seconds between progress edits
+LINK_PATTERN = re.compile(r"https?://\S+")
+
+
+# Selects messages by author, date window, regex and whether they have attachments or links.
+# None means "don't care", has_attachment/has_link False selects messages without them.
+class MessageFilter:
+    def __init__(
+        self,
+        author_id=None,
+        after=None,
+        before=None,
+        pattern=None,
+        has_attachment=None,
+        has_link=None,
+    ):
+        self.author_id = author_id
+        self.after = after
+        self.before = before
+        self.pattern = pattern
+        self.has_attachment = has_attachment
+        self.has_link = has_link
+
+    def is_empty(self):
+        return all(
+            value is None
+            for value in (
+                self.author_id,
+                self.after,
+                self.before,
+                self.pattern,
+                self.has_attachment,
+                self.has_link,
+            )
+        )
+
+    # Author and date can't change after sending, content and attachments can be edited
+    def is_immutable(self):
+        return (
+            self.pattern is None
+            and self.has_attachment is None
+            and self.has_link is None
+        )
+
+    def matches(self, author_id, created_at, content, has_attachment):
+        if self.author_id is not None and int(author_id) != self.author_id:
+            return False
+        if self.after and created_at <= self.after:
+            return False
+        if self.before and created_at >= self.before:
+            return False
+        if self.pattern and not self.pattern.search(content):
+            return False
+        if self.has_attachment is not None and has_attachment != self.has_attachment:
+            return False
+        if (
+            self.has_link is not None
+            and bool(LINK_PATTERN.search(content)) != self.has_link
+        ):
+            return False
+        return True
+
+    def matches_message(self, message):
+        return self.matches(
+            message.author.id,
+            message.created_at,
+            message.content,
+            bool(message.attachments),
+        )
+
+    def matches_backup_entry(self, entry):
+        return self.matches(
+            entry["author"]["id"],
+            datetime.fromisoformat(entry["created_at"]),
+            entry["content"],
+            bool(entry.get("attachments")),
+        )
+
+
+# Parses "24.12.2024" or "24.12.2024 18:30" in the configured timezone
+def parse_date(value):
+    for date_format in ("%d.%m.%Y %H:%M", "%d.%m.%Y"):
+        try:
+            date = datetime.strptime(value.strip(), date_format)
+            return pytz.timezone(config.TIMEZONE).localize(date)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {value}. Use DD.MM.YYYY or DD.MM.YYYY HH:MM.")
+
+
+# Deletes the given messages (or anything with an id, like discord.Object) from the channel.
+# Messages younger than 14 days go out in bulk requests of 100, older ones are deleted
+# concurrently one by one. on_progress(done, total) is awaited at most every few seconds.
+# Returns the number of deleted and failed messages.
+async def delete_messages_bulk(channel, messages, on_progress=None):
+    cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - BULK_DELETE_MAX_AGE)
+    recent = [message for message in messages if message.id > cutoff]
+    old = [message for message in messages if message.id <= cutoff]
+    total = len(recent) + len(old)
+    deleted = failed = 0
+    last_progress = time.monotonic()
+
+    async def report():
+        nonlocal last_progress
+        if on_progress and time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+            last_progress = time.monotonic()
+            await on_progress(deleted + failed, total)
+
+    for i in range(0, len(recent), BULK_DELETE_BATCH):
+        batch = recent[i : i + BULK_DELETE_BATCH]
+        try:
+            await channel.delete_messages(batch)
+            deleted += len(batch)
+        except discord.HTTPException as e:
+            print(f"Error bulk deleting {len(batch)} messages: {e}")
+            # Fall back to single deletes, e.g. if a message got older than 14 days meanwhile
+            old.extend(batch)
+        await report()
+
+    semaphore = asyncio.Semaphore(SINGLE_DELETE_CONCURRENCY)
+
+    async def delete_one(message):
+        nonlocal deleted, failed
+        async with semaphore:
+            try:
+                await channel.get_partial_message(message.id).delete()
+                deleted += 1
+            except discord.NotFound:
+                deleted += 1  # Already gone
+            except discord.HTTPException as e:
+                print(f"Error deleting message {message.id}: {e}")
+                failed += 1
+            await report()
+
+    await asyncio.gather(*(delete_one(message) for message in old))
+    return deleted, failed
 
 
 class DeleteMessages(commands.Cog):
@@ -13,24 +159,65 @@ class DeleteMessages(commands.Cog):
 
     # Command to delete messages based on count or search
     @app_commands.command(
-        name="delete", description="Delete messages based on count or search term"
+        name="delete",
+        description="Delete messages based on count, search term or filters",
     )
     @app_commands.choices(
         delete_type=[
             Choice(name="Delete by Count", value="count"),
             Choice(name="Delete by Search", value="search"),
+            Choice(name="Delete by Filter", value="filter"),
         ]
     )
     @app_commands.describe(
-        delete_type="Select whether to delete by message count or search term",
-        value="The value for the selected option: number of messages for count, term for search",
+        delete_type="Select whether to delete by message count, search term or filters",
+        value="Number of messages for count, term for search, optional regex for filter",
+        author="Filter: only messages from this user",
+        after="Filter: only messages after this date, e.g. 24.12.2024 or 24.12.2024 18:30",
+        before="Filter: only messages before this date, e.g. 24.12.2024 or 24.12.2024 18:30",
+        has_attachment="Filter: only messages with (True) or without (False) attachments",
+        has_link="Filter: only messages with (True) or without (False) links",
+        dry_run="Filter: only show what would be deleted (default: False)",
     )
     async def delete_messages(
         self,
         interaction: discord.Interaction,
         delete_type: Choice[str],
-        value: str,
+        value: str = None,
+        author: discord.User = None,
+        after: str = None,
+        before: str = None,
+        has_attachment: bool = None,
+        has_link: bool = None,
+        dry_run: bool = False,
     ):
+        if delete_type.value == "filter":
+            try:
+                message_filter = MessageFilter(
+                    author_id=author.id if author else None,
+                    after=parse_date(after) if after else None,
+                    before=parse_date(before) if before else None,
+                    pattern=re.compile(value, re.IGNORECASE) if value else None,
+                    has_attachment=has_attachment,
+                    has_link=has_link,
+                )
+            except (ValueError, re.error) as e:
+                await interaction.response.send_message(f"{e}", ephemeral=True)
+                return
+            if message_filter.is_empty():
+                await interaction.response.send_message(
+                    "Please set at least one filter.", ephemeral=True
+                )
+                return
+            await self.filter_and_prompt_delete(interaction, message_filter, dry_run)
+            return
+
+        if value is None:
+            await interaction.response.send_message(
+                "Please provide a value for count or search.", ephemeral=True
+            )
+            return
+
         # Logic based on choice selection
         if delete_type.value == "count":
             try:
@@ -58,8 +245,75 @@ class DeleteMessages(commands.Cog):
             )
             return
 
-        count_to_delete = len(messages)
-        await self.prompt_delete(interaction, found_message, count_to_delete)
+        await self.prompt_delete(interaction, found_message, messages)
+
+    async def filter_and_prompt_delete(self, interaction, message_filter, dry_run):
+        await interaction.response.defer(ephemeral=True)
+        channel = interaction.channel
+        matched = []  # discord.Object ids, deleting needs nothing else
+        authors = Counter()
+
+        def add(message_id, author_id):
+            matched.append(discord.Object(id=int(message_id)))
+            authors[int(author_id)] += 1
+
+        # The latest complete backup serves as index, only newer messages are fetched.
+        # Saved content may have been edited since, so only author and date filters use it.
+        indexed = None
+        if message_filter.is_immutable():
+            backup_data = await asyncio.to_thread(load_latest_backup, channel.id)
+            indexed = backup_data and backup_data.get("channel", {}).get("messages")
+
+        if indexed:
+            for entry in indexed:
+                if message_filter.matches_backup_entry(entry):
+                    add(entry["id"], entry["author"]["id"])
+            history = channel.history(
+                limit=None, after=discord.Object(id=int(indexed[0]["id"]))
+            )
+            backup_time = datetime.strptime(backup_data["backup_date"], "%Y%m%d-%H%M%S")
+            source = (
+                f"backup from {backup_time.strftime('%d.%m.%Y at %H:%M')} and newer "
+                "messages, ones deleted since the backup are skipped when deleting"
+            )
+        else:
+            # One streamed pass, limited to the date window if there is one
+            history = channel.history(
+                limit=None, after=message_filter.after, before=message_filter.before
+            )
+            source = "channel history"
+
+        async for message in history:
+            if message_filter.matches_message(message):
+                add(message.id, message.author.id)
+
+        if not matched:
+            await interaction.edit_original_response(
+                content="No messages match the filters."
+            )
+            return
+
+        cutoff = discord.utils.time_snowflake(
+            discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+        )
+        recent = sum(1 for message in matched if message.id > cutoff)
+        top_authors = ", ".join(
+            f"<@{author_id}>: {count}" for author_id, count in authors.most_common(5)
+        )
+        preview = (
+            f"**{len(matched)} messages** match the filters (searched {source}).\n"
+            f"{recent} can be bulk deleted, {len(matched) - recent} are older than 14 days "
+            f"and are deleted one by one.\nTop authors: {top_authors}"
+        )
+
+        if dry_run:
+            await interaction.edit_original_response(content=f"Dry run: {preview}")
+            return
+
+        await interaction.edit_original_response(
+            content=f"{preview}\n\nDo you want to **delete these messages**?\n\n︕ *Cannot be undone.*",
+            view=ConfirmDeleteView(interaction, matched),
+        )
 
     async def prompt_delete_by_count(self, interaction, count):
         # Fetch messages based on the count
@@ -76,9 +330,10 @@ class DeleteMessages(commands.Cog):
             return
 
         found_message = messages[-1]  # Get the last message in the list (count)
-        await self.prompt_delete(interaction, found_message, count)
+        await self.prompt_delete(interaction, found_message, messages[:count])
 
-    async def prompt_delete(self, interaction, found_message, count=None):
+    # The messages collected while searching are deleted directly, nothing is fetched again
+    async def prompt_delete(self, interaction, found_message, messages):
         local_tz = pytz.timezone(config.TIMEZONE)
 
         # Convert the message creation time from UTC to the local timezone
@@ -98,19 +353,19 @@ class DeleteMessages(commands.Cog):
         )
 
         # Ask for confirmation with formatted message
-        view = ConfirmDeleteView(interaction, count)
+        view = ConfirmDeleteView(interaction, messages)
         await interaction.response.send_message(
-            f"{formatted_message}\n\nDo you want to **delete {count} messages** up to this one?\n\n︕ *Feature is being tested. Don't use on important channels. Cannot be undone.*\n",
+            f"{formatted_message}\n\nDo you want to **delete {len(messages)} messages** up to this one?\n\n︕ *Feature is being tested. Don't use on important channels. Cannot be undone.*\n",
             view=view,
             ephemeral=True,
         )
 
 
 class ConfirmDeleteView(discord.ui.View):
-    def __init__(self, interaction, count=None, timeout=60):
+    def __init__(self, interaction, messages, timeout=60):
         super().__init__(timeout=timeout)
         self.interaction = interaction
-        self.count = count
+        self.messages = messages
 
     @discord.ui.button(label="Delete", style=discord.ButtonStyle.red)
     async def confirm(
@@ -123,14 +378,21 @@ class ConfirmDeleteView(discord.ui.View):
             content="Deleting messages...", view=self
         )
 
-        # Delete messages based on the count
-        await interaction.channel.purge(limit=self.count)
+        async def on_progress(done, total):
+            await self.interaction.edit_original_response(
+                content=f"Deleting messages... {done}/{total}"
+            )
 
-        # Edit the original response to show the deletion message
-        await self.interaction.edit_original_response(
-            content=f"{self.count} Messages deleted.", view=None
+        deleted, failed = await delete_messages_bulk(
+            interaction.channel, self.messages, on_progress
         )
 
+        # Edit the original response to show the deletion message
+        content = f"{deleted} Messages deleted."
+        if failed:
+            content += f" {failed} could not be deleted."
+        await self.interaction.edit_original_response(content=content, view=None)
+
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.gray)
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Disable the buttons after the first click
@@ -0,0 +1,77 @@
+from datetime import datetime
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord.app_commands import Choice
+from services.world_backup import WorldBackupService
+
+
+class MinecraftBackup(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="mcbackup", description="Create, list or restore Minecraft world backups"
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        action="What to do with the world backups",
+        snapshot="Snapshot to restore, e.g. 20241025-233425 (default: latest)",
+    )
+    @app_commands.choices(
+        action=[
+            Choice(name="Create Backup", value="create"),
+            Choice(name="List Backups", value="list"),
+            Choice(name="Restore Backup", value="restore"),
+        ]
+    )
+    async def mcbackup(
+        self,
+        interaction: discord.Interaction,
+        action: Choice[str],
+        snapshot: str = None,
+    ):
+        world_backup = self.bot.services.get(WorldBackupService)
+        if not world_backup or not world_backup.store:
+            await interaction.response.send_message(
+                "World backups are not configured. Set WORLD_PATH in the .env file.",
+                ephemeral=True,
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        if action.value == "create":
+            name, stats = await world_backup.create_backup()
+            await interaction.followup.send(
+                f"World backup **{name}** created. {stats['files']} files, "
+                f"{stats['reused']} unchanged, {stats['changed_chunks']} changed chunks, "
+                f"{stats['new_objects']} new objects "
+                f"({stats['new_bytes'] / 1024 / 1024:.1f} MB)."
+            )
+        elif action.value == "list":
+            snapshots = world_backup.store.list_snapshots()
+            lines = [
+                f"`{name}` ({datetime.strptime(name, '%Y%m%d-%H%M%S').strftime('%d.%m.%Y at %H:%M')})"
+                for name in snapshots[:20]
+            ]
+            await interaction.followup.send(
+                "\n".join(lines) or "No world backups found."
+            )
+        elif action.value == "restore":
+            snapshots = world_backup.store.list_snapshots()
+            snapshot = snapshot or (snapshots[0] if snapshots else None)
+            if snapshot not in snapshots:
+                await interaction.followup.send("Snapshot not found.")
+                return
+            try:
+                await world_backup.restore_backup(snapshot)
+            except RuntimeError as e:
+                await interaction.followup.send(str(e))
+                return
+            await interaction.followup.send(f"World restored from **{snapshot}**.")
+
+
+# Add cog to the bot
+async def setup(bot):
+    await bot.add_cog(MinecraftBackup(bot))
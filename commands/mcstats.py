@@ -0,0 +1,119 @@
+import io
+import math
+import time
+import asyncio
+from datetime import datetime
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord.app_commands import Choice
+import pytz
+import config
+from services.mc_metrics import MinecraftMetricsService
+
+# Period -> (seconds to look back, tier to read)
+PERIODS = {
+    "hour": (3600, "raw"),
+    "day": (24 * 3600, "1m"),
+    "week": (7 * 24 * 3600, "1h"),
+    "month": (30 * 24 * 3600, "1h"),
+}
+
+
+class MinecraftStats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="mcstats", description="Shows Minecraft server performance over time"
+    )
+    @app_commands.describe(
+        period="Time range to show (default: last day)",
+        ephemeral="Only I can see the response (default: False)",
+    )
+    @app_commands.choices(
+        period=[
+            Choice(name="Last Hour", value="hour"),
+            Choice(name="Last Day", value="day"),
+            Choice(name="Last Week", value="week"),
+            Choice(name="Last Month", value="month"),
+        ]
+    )
+    async def mcstats(
+        self,
+        interaction: discord.Interaction,
+        period: Choice[str] = None,
+        ephemeral: bool = False,
+    ):
+        metrics = self.bot.services.get(MinecraftMetricsService)
+        if not metrics:
+            await interaction.response.send_message(
+                "Metrics collection is not running.", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=ephemeral)
+        period_name = period.name if period else "Last Day"
+        seconds, tier = PERIODS[period.value if period else "day"]
+        records = metrics.store.read(tier, since=int(time.time()) - seconds)
+
+        if not len(records):
+            await interaction.followup.send("No metrics recorded for this period yet.")
+            return
+
+        # Rendering takes long enough to stall the bot, keep it off the event loop
+        chart = await asyncio.to_thread(self.generate_stats_chart, records, period_name)
+
+        latest = records[-1]
+        embed = discord.Embed(
+            title="Minecraft Server Stats",
+            description=(
+                f"**TPS:** {self.format_value(latest['tps'], '{:.1f}')}\n"
+                f"**MSPT:** {self.format_value(latest['mspt'], '{:.1f} ms')}\n"
+                f"**Players:** {self.format_value(latest['players'], '{:.0f}')}\n"
+                f"**Memory:** {self.format_value(latest['memory'], '{:.0f} MB')}"
+            ),
+            color=0x7289DA,
+        )
+        embed.set_image(url="attachment://mcstats.png")
+        await interaction.followup.send(
+            embed=embed, file=discord.File(chart, filename="mcstats.png")
+        )
+
+    @staticmethod
+    def format_value(value, fmt):
+        return "N/A" if math.isnan(value) else fmt.format(value)
+
+    def generate_stats_chart(self, records, period_name):
+        # Uses the Figure API since pyplot's global state is not thread-safe
+        from matplotlib.figure import Figure
+
+        timezone = pytz.timezone(config.TIMEZONE)
+        times = [datetime.fromtimestamp(t, timezone) for t in records["time"]]
+        panels = [
+            ("tps", "TPS", "g"),
+            ("mspt", "MSPT (ms)", "r"),
+            ("players", "Players", "b"),
+            ("memory", "Memory (MB)", "m"),
+        ]
+
+        figure = Figure(figsize=(12, 8))
+        axes = figure.subplots(len(panels), 1, sharex=True)
+        for ax, (field, label, color) in zip(axes, panels):
+            ax.plot(times, records[field], linestyle="-", color=color)
+            ax.set_ylabel(label)
+            ax.grid(True, linestyle="--", linewidth=0.5)
+        axes[0].set_title(f"Minecraft Server Stats ({period_name})")
+        axes[-1].set_xlabel("Time")
+        axes[-1].tick_params(axis="x", labelrotation=45)
+        figure.tight_layout()
+
+        buf = io.BytesIO()
+        figure.savefig(buf, format="png")
+        buf.seek(0)
+        return buf
+
+
+# Add cog to the bot
+async def setup(bot):
+    await bot.add_cog(MinecraftStats(bot))
@@ -1,6 +1,6 @@
 from discord.ext import commands
 import config
-from mcrcon import MCRcon
+from services.rcon_pool import RconPool
 
 
 class Minecraft(commands.Cog):
@@ -8,13 +8,9 @@ class Minecraft(commands.Cog):
         self.bot = bot
 
     # Function to send an RCON command to the Minecraft server
-    def send_rcon_command(self, command):
+    async def send_rcon_command(self, command):
         try:
-            with MCRcon(
-                config.RCON_IP, config.RCON_PASSWORD, port=config.RCON_PORT
-            ) as mcr:
-                response = mcr.command(command)
-                return response
+            return await self.bot.services.get(RconPool).command(command)
         except Exception as e:
             print(f"Error sending RCON command: {e}")
             return None
@@ -27,7 +23,7 @@ class Minecraft(commands.Cog):
 
         if message.channel.id == config.CONSOLE_CHANNEL_ID:
             try:
-                response = self.send_rcon_command(message.content)
+                response = await self.send_rcon_command(message.content)
                 if response:
                     await message.channel.send(f"{response}")
             except Exception as e:
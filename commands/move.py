@@ -1,8 +1,35 @@
+import re
+import asyncio
 from typing import Union
 
 import discord
 from discord import app_commands
 from discord.ext import commands
+import config
+
+MOVE_RETRIES = 3  # Extra attempts after a 429 that discord.py gave up on
+CHANNEL_MENTION_PATTERN = re.compile(r"<#(\d+)>")
+
+
+# Moves the members concurrently, returns the number of moved members and the failed ones
+async def move_members(members, channel):
+    semaphore = asyncio.Semaphore(config.MOVE_CONCURRENCY)
+
+    async def move_one(member):
+        async with semaphore:
+            for attempt in range(MOVE_RETRIES + 1):
+                try:
+                    await member.move_to(channel)
+                    return True
+                except discord.HTTPException as e:
+                    if e.status != 429 or attempt == MOVE_RETRIES:
+                        print(f"Error moving {member.display_name}: {e}")
+                        return False
+                    await asyncio.sleep(float(e.response.headers.get("Retry-After", 1)))
+
+    results = await asyncio.gather(*(move_one(member) for member in members))
+    failed = [member for member, moved in zip(members, results) if not moved]
+    return len(members) - len(failed), failed
 
 
 class Move(commands.Cog):
@@ -10,9 +37,19 @@ class Move(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="move", description="Move all Users to a voice channel")
-    @app_commands.rename(from_channel='from')
-    @app_commands.describe(to="The voice channel to move to", from_channel="The voice channel from which everyone will be moved")
-    async def move(self, interaction: discord.Interaction, to: discord.VoiceChannel = None, from_channel: discord.VoiceChannel = None):
+    @app_commands.rename(from_channel="from")
+    @app_commands.describe(
+        to="The voice channel to move to",
+        from_channel="The voice channel from which everyone will be moved",
+        sources="Several voice channels to move from at once, e.g. #General #Gaming",
+    )
+    async def move(
+        self,
+        interaction: discord.Interaction,
+        to: discord.VoiceChannel = None,
+        from_channel: discord.VoiceChannel = None,
+        sources: str = None,
+    ):
         if not interaction.user.voice:
             await interaction.response.send_message("You are not in a voice channel!")
             return
@@ -20,20 +57,47 @@ class Move(commands.Cog):
         if not to:
             to = interaction.user.voice.channel
 
-        if from_channel and from_channel == to:
-            await interaction.response.send_message("That is unnecessary!")
+        if sources:
+            source_channels = [
+                interaction.guild.get_channel(int(channel_id))
+                for channel_id in CHANNEL_MENTION_PATTERN.findall(sources)
+            ]
+            source_channels = [
+                channel
+                for channel in source_channels
+                if isinstance(channel, discord.VoiceChannel) and channel != to
+            ]
+            if not source_channels:
+                await interaction.response.send_message(
+                    "No voice channels to move from found in sources.", ephemeral=True
+                )
+                return
+            description = (
+                f"from {', '.join(channel.name for channel in source_channels)} "
+            )
+        elif from_channel:
+            if from_channel == to:
+                await interaction.response.send_message("That is unnecessary!")
+                return
+            source_channels = [from_channel]
+            description = f"from {from_channel.name} "
+        else:
+            source_channels = [
+                channel for channel in interaction.guild.voice_channels if channel != to
+            ]
+            description = ""
 
-        if from_channel:
-            await interaction.response.send_message(f"Moving everyone from {from_channel.name} to {to.name}")
-            for member in from_channel.members:
-                await  member.move_to(to)
-            return
+        members = [member for channel in source_channels for member in channel.members]
+        await interaction.response.send_message(
+            f"Moving everyone {description}to {to.name}"
+        )
 
-        await interaction.response.send_message(f"Moving everyone to {to.name}")
+        moved, failed = await move_members(members, to)
 
-        for channel in interaction.guild.voice_channels:
-            for member in channel.members:
-                await member.move_to(to)
+        summary = f"Moved {moved} member{'s' if moved != 1 else ''} {description}to {to.name}."
+        if failed:
+            summary += f" Could not move {', '.join(member.display_name for member in failed)}."
+        await interaction.edit_original_response(content=summary)
 
 
 # Setup function to add the Cog to the bot
@@ -0,0 +1,84 @@
+import time
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord.app_commands import Choice
+from services.perf import PerfMetrics
+
+MAX_ROWS = 15  # Embed fields are limited, the slowest entries by total time are shown
+
+
+class Perf(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="perf", description="Shows latency and error counts of the bot"
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(kind="What to show (default: commands)")
+    @app_commands.choices(
+        kind=[
+            Choice(name="Commands", value="command"),
+            Choice(name="Event Listeners", value="event"),
+            Choice(name="Task Loops", value="loop"),
+            Choice(name="Service Calls", value="service"),
+        ]
+    )
+    async def perf(self, interaction: discord.Interaction, kind: Choice[str] = None):
+        metrics = self.bot.services.get(PerfMetrics)
+        if not metrics:
+            await interaction.response.send_message(
+                "Performance metrics are not being collected.", ephemeral=True
+            )
+            return
+
+        kind_name = kind.name if kind else "Commands"
+        histograms = metrics.histograms[kind.value if kind else "command"]
+        rows = sorted(histograms.items(), key=lambda x: x[1].total, reverse=True)
+
+        lines = [
+            f"`{name}` {histogram.count}x, "
+            f"p50 {format_ms(histogram.percentile(0.5))}, "
+            f"p95 {format_ms(histogram.percentile(0.95))}, "
+            f"max {format_ms(histogram.max)}"
+            + (f", **{histogram.errors} errors**" if histogram.errors else "")
+            for name, histogram in rows[:MAX_ROWS]
+        ]
+        if len(rows) > MAX_ROWS:
+            lines.append(f"... and {len(rows) - MAX_ROWS} more")
+
+        uptime = (time.time() - metrics.started) / 3600
+        embed = discord.Embed(
+            title=f"Performance: {kind_name}",
+            description="\n".join(lines) or "Nothing recorded yet.",
+            color=0x7289DA,
+        )
+        embed.add_field(
+            name="Event Loop Lag",
+            value=(
+                f"now {format_ms(metrics.last_lag)}, "
+                f"p95 {format_ms(metrics.lag.percentile(0.95))}, "
+                f"max {format_ms(metrics.lag.max)}"
+            ),
+        )
+        embed.add_field(
+            name="Rate Limits (429 responses)",
+            value=(
+                f"{metrics.rate_limits} received, {metrics.rate_limit_wait:.1f}s "
+                f"waited, {metrics.global_rate_limits} global"
+            ),
+        )
+        embed.set_footer(
+            text=f"Since {uptime:.1f} hours. Percentiles are histogram bucket bounds."
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+def format_ms(seconds):
+    return f"{seconds * 1000:.0f} ms" if seconds >= 0.01 else f"{seconds * 1000:.1f} ms"
+
+
+# Add cog to the bot
+async def setup(bot):
+    await bot.add_cog(Perf(bot))
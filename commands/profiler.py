@@ -0,0 +1,88 @@
+import os
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord.app_commands import Choice
+from services.profiler import SamplingProfiler
+from services.watchdog import LoopWatchdog
+
+MAX_STACK_LINES = 8  # Innermost lines of each stall's stack shown in Discord
+
+
+class Profiler(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="profiler", description="Profile the bot or show where it was blocked"
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(action="What to do")
+    @app_commands.choices(
+        action=[
+            Choice(name="Start Profiling", value="start"),
+            Choice(name="Stop Profiling", value="stop"),
+            Choice(name="Recent Stalls", value="stalls"),
+        ]
+    )
+    async def profiler(self, interaction: discord.Interaction, action: Choice[str]):
+        # Stacks show code and file paths, so this is for the owner only
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                "Only the bot owner can use this command.", ephemeral=True
+            )
+            return
+
+        profiler = self.bot.services.get(SamplingProfiler)
+        if action.value == "start":
+            try:
+                profiler.start_session()
+            except RuntimeError as e:
+                await interaction.response.send_message(str(e), ephemeral=True)
+                return
+            await interaction.response.send_message(
+                "Profiling started. Stop it to get the flamegraph file.", ephemeral=True
+            )
+        elif action.value == "stop":
+            try:
+                path, samples = await profiler.stop_session()
+            except RuntimeError as e:
+                await interaction.response.send_message(str(e), ephemeral=True)
+                return
+            await interaction.response.send_message(
+                f"Saved {samples} samples to `{path}`. Open it on speedscope.app "
+                "or render it with flamegraph.pl.",
+                file=discord.File(path, filename=os.path.basename(path)),
+                ephemeral=True,
+            )
+        elif action.value == "stalls":
+            await interaction.response.send_message(
+                self.format_stalls(self.bot.services.get(LoopWatchdog)), ephemeral=True
+            )
+
+    @staticmethod
+    def format_stalls(watchdog):
+        if not watchdog or not watchdog.stalls:
+            return "No event loop stalls recorded."
+
+        message = ""
+        for stall in reversed(watchdog.stalls):
+            duration = (
+                f"{stall['duration']:.2f}s"
+                if stall["duration"] is not None
+                else "still blocked"
+            )
+            stack = "\n".join(stall["stack"].splitlines()[-MAX_STACK_LINES:])
+            entry = (
+                f"**{stall['time'].strftime('%d.%m.%Y %H:%M:%S')}** ({duration})\n"
+                f"```{stack}```\n"
+            )
+            if len(message) + len(entry) > 2000:
+                break
+            message += entry
+        return message or "The latest stall is too long to show, see the log."
+
+
+# Add cog to the bot
+async def setup(bot):
+    await bot.add_cog(Profiler(bot))
@@ -0,0 +1,140 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord.app_commands import Choice
+from services.uno_sessions import UnoSessionService, format_turn
+
+
+class Uno(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="uno", description="Play Uno against the AI")
+    @app_commands.describe(
+        action="What to do in your Uno game",
+        card="Number of the card in your hand to play",
+        color="New color when playing a Wild or +4 card",
+        opponents="Number of AI opponents for a new game (default: 1)",
+    )
+    @app_commands.choices(
+        action=[
+            Choice(name="Start Game", value="start"),
+            Choice(name="Play Card", value="play"),
+            Choice(name="Draw Card", value="draw"),
+            Choice(name="Show Hand", value="hand"),
+            Choice(name="Quit Game", value="quit"),
+        ],
+        color=[
+            Choice(name="Red", value="Rot"),
+            Choice(name="Yellow", value="Gelb"),
+            Choice(name="Green", value="Grün"),
+            Choice(name="Blue", value="Blau"),
+        ],
+    )
+    async def uno(
+        self,
+        interaction: discord.Interaction,
+        action: Choice[str],
+        card: app_commands.Range[int, 1] = None,
+        color: Choice[str] = None,
+        opponents: app_commands.Range[int, 1, 3] = 1,
+    ):
+        sessions = self.bot.services.get(UnoSessionService)
+        if not sessions:
+            await interaction.response.send_message(
+                "Uno is not available right now.", ephemeral=True
+            )
+            return
+
+        if action.value == "start":
+            running = sessions.sessions.get(interaction.channel_id)
+            if running and running.user.id != interaction.user.id:
+                await interaction.response.send_message(
+                    f"{running.user.display_name} is already playing Uno in this channel.",
+                    ephemeral=True,
+                )
+                return
+            session, evicted = sessions.create(
+                interaction.channel, interaction.user, opponents + 1
+            )
+            if evicted:
+                await sessions.send(
+                    evicted, "Uno game ended to make room for a new one."
+                )
+            await interaction.response.send_message(
+                f"Uno against {opponents} AI opponent{'s' if opponents > 1 else ''}.\n"
+                + format_turn(session)
+            )
+            return
+
+        session = sessions.get(interaction.channel_id)
+        if not session or session.user.id != interaction.user.id:
+            await interaction.response.send_message(
+                "You have no Uno game in this channel. Start one first.", ephemeral=True
+            )
+            return
+
+        game = session.game
+        if action.value == "quit":
+            sessions.end(session)
+            await interaction.response.send_message("Uno game ended.")
+            return
+
+        if action.value == "hand" or game.current_player != 0:
+            note = "" if game.current_player == 0 else "The AI is still playing.\n"
+            await interaction.response.send_message(
+                note + format_turn(session), ephemeral=True
+            )
+            return
+
+        if action.value == "draw":
+            hand_size = len(game.players[0])
+            game.step(None)
+            if len(game.players[0]) > hand_size:
+                message = (
+                    f"{interaction.user.display_name} draws **{game.players[0][-1]}**."
+                )
+            else:
+                message = "No cards left to draw."
+            await interaction.response.send_message(message)
+            return
+
+        # Play a card
+        hand = game.players[0]
+        if card is None or card > len(hand):
+            await interaction.response.send_message(
+                f"Choose a card number between 1 and {len(hand)}.", ephemeral=True
+            )
+            return
+        chosen = hand[card - 1]
+        if not chosen.is_playable_on(game.discard_pile[-1]):
+            await interaction.response.send_message(
+                f"**{chosen}** can't be played on **{game.discard_pile[-1]}**.",
+                ephemeral=True,
+            )
+            return
+        if chosen.color is None:
+            if not color:
+                await interaction.response.send_message(
+                    "Choose a color for this card.", ephemeral=True
+                )
+                return
+            # Set before playing, otherwise the game asks for the color on the console
+            chosen.color = color.value
+
+        game.step(chosen)
+        message = f"{interaction.user.display_name} plays **{chosen}**."
+        if game.check_winner() == 0:
+            sessions.end(session)
+            message += "\nYou win, congratulations!"
+        else:
+            if len(hand) == 1:
+                message += " Uno!"
+            if game.current_player == 0:  # The turn came back before any AI moved
+                message += "\n" + format_turn(session)
+        await interaction.response.send_message(message)
+
+
+# Add cog to the bot
+async def setup(bot):
+    await bot.add_cog(Uno(bot))
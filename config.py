@@ -8,6 +8,14 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 RCON_PASSWORD = os.getenv("RCON_PASSWORD")
 LOG_FILE_PATH = os.getenv("LOG_FILE_PATH")
+# Commands are synced to this guild only, which is instant, while developing
+DEV_GUILD_ID = int(os.getenv("DEV_GUILD_ID")) if os.getenv("DEV_GUILD_ID") else None
+# Defaults to the "world" folder next to the server's "logs" folder
+WORLD_PATH = os.getenv("WORLD_PATH") or (
+    os.path.join(os.path.dirname(os.path.dirname(LOG_FILE_PATH)), "world")
+    if LOG_FILE_PATH
+    else None
+)
 
 # Constants
 RCON_PORT = 25575
@@ -15,3 +23,25 @@ CONSOLE_CHANNEL_ID = 1292595944344256553
 RCON_IP = "localhost"
 TIMEZONE = "Europe/Berlin"
 BACKUP_PATH = "./output/backups"
+COMMAND_HASH_PATH = "./output/command_hashes.json"  # Delete to force a resync
+METRICS_PATH = "./output/metrics"
+METRICS_INTERVAL = 30  # Seconds between Minecraft metrics samples
+WORLD_BACKUP_PATH = "./output/world_backups"
+WORLD_BACKUP_KEEP = 24  # Number of world snapshots to keep
+WORLD_BACKUP_INTERVAL = 6  # Hours between automatic world snapshots
+# "full": all members are fetched at startup and cached (discord.py default)
+# "lazy": no fetching at startup, members are cached as they show up
+# "seen": discord.py only keeps members in voice, MemberCache keeps message authors
+MEMBER_CACHE_MODE = "lazy"
+MEMBER_CACHE_SIZE = 5000  # Members kept by MemberCache, least recently used are dropped
+UNO_MODEL_PATH = "./services/uno_model.npz"  # See uno_service.export_numpy_model
+# The least recently active game is ended when a new one would exceed this
+UNO_MAX_SESSIONS = 100
+UNO_IDLE_TIMEOUT = 15  # Minutes without a move before a game is ended
+# Members moved at once by /move. Moves share one rate limit bucket per guild, so
+# more concurrent requests only queue up in discord.py.
+MOVE_CONCURRENCY = 10
+PERF_METRICS_PORT = None  # Set e.g. to 9105 to serve Prometheus metrics on localhost
+WATCHDOG_THRESHOLD = 0.5  # Seconds the event loop may be blocked before it is logged
+PROFILES_PATH = "./output/profiles"  # Flamegraph files written by /profiler
+BENCHMARK_PATH = "./output/benchmarks"  # Results of python -m benchmarks
@@ -0,0 +1,79 @@
+from typing import Optional, Type, TypeVar
+from discord.ext import tasks
+
+T = TypeVar("T")
+
+
+class ServiceRegistry:
+    # Holds the one shared instance of every service. Services list the services
+    # they need in a `dependencies` class attribute, those are created and started
+    # first. Optional hooks: `async start()`, `async stop()`, and
+    # `export_state()` / `import_state(state)` to survive a restart.
+    def __init__(self, bot):
+        self.bot = bot
+        self.services = {}  # Class name -> instance, in start order
+
+    # Instances are looked up by class name so reloaded modules still match
+    def get(self, cls: Type[T]) -> Optional[T]:
+        return self.services.get(cls.__name__)
+
+    def __iter__(self):
+        return iter(self.services.values())
+
+    def create(self, classes):
+        # Instantiates the classes, dependencies first
+        pending = {cls.__name__: cls for cls in classes}
+        created = []
+
+        def visit(cls, path):
+            if cls.__name__ in self.services:
+                return
+            if cls.__name__ in path:
+                raise RuntimeError(f"Circular service dependency: {' -> '.join(path)}")
+            for dependency in getattr(cls, "dependencies", ()):
+                if dependency.__name__ not in pending:
+                    raise RuntimeError(
+                        f"{cls.__name__} depends on {dependency.__name__}, which is not loaded"
+                    )
+                visit(pending[dependency.__name__], path + [cls.__name__])
+            self.services[cls.__name__] = cls(self.bot)
+            created.append(cls.__name__)
+
+        for cls in classes:
+            visit(cls, [])
+        return created
+
+    async def start_all(self):
+        for service in self.services.values():
+            await self.start_service(service)
+
+    async def stop_all(self):
+        for service in reversed(list(self.services.values())):
+            await self.stop_service(service)
+
+    @staticmethod
+    async def start_service(service):
+        if hasattr(service, "start"):
+            await service.start()
+
+    @staticmethod
+    async def stop_service(service):
+        for attribute in vars(service).values():
+            if isinstance(attribute, tasks.Loop):
+                attribute.cancel()
+        if hasattr(service, "stop"):
+            await service.stop()
+
+    async def restart(self, cls):
+        # Replaces the running instance with one of cls (e.g. from a reloaded module)
+        # The new instance is created first so a broken __init__ keeps the old one
+        old_service = self.services[cls.__name__]
+        state = (
+            old_service.export_state() if hasattr(old_service, "export_state") else None
+        )
+        new_service = cls(self.bot)
+        await self.stop_service(old_service)
+        if state is not None and hasattr(new_service, "import_state"):
+            new_service.import_state(state)
+        self.services[cls.__name__] = new_service
+        await self.start_service(new_service)
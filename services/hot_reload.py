@@ -0,0 +1,85 @@
+import os
+import sys
+import importlib
+from discord.ext import commands, tasks
+import command_sync
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+WATCHED_DIRECTORIES = ("commands", "services")
+
+
+class HotReloader:
+    def __init__(self, bot):
+        self.bot = bot
+        self.mtimes = self.scan()  # Module name -> last seen modification time
+
+    async def start(self):
+        self.watch.start()
+
+    def scan(self):
+        mtimes = {}
+        for directory in WATCHED_DIRECTORIES:
+            for filename in os.listdir(directory):
+                if filename.endswith(".py"):
+                    path = os.path.join(directory, filename)
+                    mtimes[f"{directory}.{filename[:-3]}"] = os.stat(path).st_mtime_ns
+        return mtimes
+
+    @tasks.loop(seconds=2)
+    async def watch(self):
+        mtimes = self.scan()
+        changed = [
+            name for name, mtime in mtimes.items() if self.mtimes.get(name) != mtime
+        ]
+        self.mtimes = mtimes
+        if not changed:
+            return
+
+        for name in changed:
+            try:
+                if name.startswith("commands."):
+                    await self.reload_command(name)
+                else:
+                    await self.reload_service(name)
+            except Exception as e:
+                logger.error(f"Error reloading {name}: {e}")
+
+        # Reloading a cog without touching its commands needs no sync
+        try:
+            synced = await command_sync.sync_commands(self.bot, config.DEV_GUILD_ID)
+            if synced is not None:
+                logger.info(f"Synced {len(synced)} commands after reload.")
+        except Exception as e:
+            logger.error(f"Error syncing commands: {e}")
+
+    @watch.before_loop
+    async def before_watch(self):
+        await self.bot.wait_until_ready()
+
+    async def reload_command(self, name):
+        if name in self.bot.extensions:
+            # discord.py rolls back to the old module if the new one fails to load
+            await self.bot.reload_extension(name)
+            logger.info(f"Reloaded command {name}")
+            return
+
+        try:
+            await self.bot.load_extension(name)
+            logger.info(f"Loaded new command {name}")
+        except commands.NoEntryPointError:
+            pass  # Helper module without a cog
+
+    async def reload_service(self, name):
+        # Modules that were never imported are picked up on first use anyway
+        module = sys.modules.get(name)
+        if module is None or name == __name__:
+            return
+
+        module = importlib.reload(module)
+        for service in list(self.bot.services):
+            if type(service).__module__ == name:
+                await self.bot.services.restart(getattr(module, type(service).__name__))
+                logger.info(f"Restarted service {type(service).__name__}")
@@ -0,0 +1,232 @@
+import os
+import re
+import time
+import math
+import numpy as np
+from discord.ext import tasks
+import config
+from services.rcon_pool import RconPool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One fixed-size record per sample, 20 bytes on disk
+RECORD_DTYPE = np.dtype(
+    [
+        ("time", "<u4"),
+        ("tps", "<f4"),
+        ("mspt", "<f4"),
+        ("players", "<f4"),
+        ("memory", "<f4"),  # Used heap in MB
+    ]
+)
+METRIC_FIELDS = RECORD_DTYPE.names[1:]
+
+# Tier name -> (bucket size in seconds, retention in seconds)
+TIERS = {
+    "raw": (0, 2 * 24 * 3600),
+    "1m": (60, 14 * 24 * 3600),
+    "1h": (3600, 5 * 365 * 24 * 3600),
+}
+
+COLOR_CODE_PATTERN = re.compile(r"§.")
+NUMBER = r"(\d+(?:\.\d+)?)"
+
+
+class MetricsStore:
+    # Append-only binary time series with averaged downsampling tiers
+    def __init__(self, path):
+        self.path = path
+        self.pending = {}  # Tier -> (bucket start, list of records) not yet written
+        os.makedirs(path, exist_ok=True)
+
+    def tier_file(self, tier):
+        return os.path.join(self.path, f"{tier}.bin")
+
+    def append(self, record):
+        # record is a (time, tps, mspt, players, memory) tuple
+        records = np.array([record], dtype=RECORD_DTYPE)
+        self.write(tier="raw", records=records)
+        record = records[0]
+
+        for tier, (bucket_size, _) in TIERS.items():
+            if not bucket_size:
+                continue
+            bucket = record["time"] - record["time"] % bucket_size
+            start, records = self.pending.get(tier, (bucket, []))
+            if bucket != start and records:
+                self.write(tier, self.average(start, records))
+                records = []
+            records.append(record)
+            self.pending[tier] = (bucket, records)
+
+    @staticmethod
+    def average(bucket, records):
+        records = np.array(records, dtype=RECORD_DTYPE)
+        averaged = np.zeros(1, dtype=RECORD_DTYPE)
+        averaged["time"] = bucket
+        for field in METRIC_FIELDS:
+            values = records[field]
+            values = values[~np.isnan(values)]
+            averaged[field] = values.mean() if len(values) else np.nan
+        return averaged
+
+    def write(self, tier, records):
+        with open(self.tier_file(tier), "ab") as f:
+            records.tofile(f)
+        self.compact(tier)
+
+    def compact(self, tier):
+        # Drops expired records once a quarter of the file is past its retention
+        path = self.tier_file(tier)
+        _, retention = TIERS[tier]
+        first = np.fromfile(path, dtype=RECORD_DTYPE, count=1)
+        if not len(first):
+            return
+        cutoff = time.time() - retention
+        if first["time"][0] > cutoff - retention / 4:
+            return
+
+        records = np.fromfile(path, dtype=RECORD_DTYPE)
+        records = records[records["time"] >= cutoff]
+        tmp_path = f"{path}.tmp"
+        records.tofile(tmp_path)
+        os.replace(tmp_path, path)
+        logger.info(f"Compacted {tier} metrics to {len(records)} records.")
+
+    def read(self, tier, since=0):
+        path = self.tier_file(tier)
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        records = np.fromfile(path, dtype=RECORD_DTYPE)
+        start = np.searchsorted(records["time"], since)
+        return records[start:]
+
+
+class MinecraftMetricsService:
+    dependencies = [RconPool]
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = MetricsStore(config.METRICS_PATH)
+        self.tick_probe = None  # The tick command this server understands
+        self.memory_probe = None  # Whether the server answers the memory command
+
+    async def start(self):
+        self.sample.change_interval(seconds=config.METRICS_INTERVAL)
+        self.sample.start()
+
+    # State kept when the service is hot-reloaded
+    def export_state(self):
+        return {"pending": self.store.pending, "memory_probe": self.memory_probe}
+
+    def import_state(self, state):
+        self.store.pending = state["pending"]
+        self.memory_probe = state["memory_probe"]
+
+    async def rcon(self, command):
+        response = await self.bot.services.get(RconPool).command(command)
+        return COLOR_CODE_PATTERN.sub("", response)
+
+    # Paper and Spigot: "TPS from last 1m, 5m, 15m: 19.98, 20.0, 20.0"
+    async def probe_paper(self):
+        tps_response = await self.rcon("tps")
+        tps = re.search(r"TPS from last.*?:\s*\*?" + NUMBER, tps_response)
+        if not tps:
+            return None
+        # Paper only: "Server tick times (avg/min/max) from last 5s, 10s, 1m: 1.2/0.9/3.1, ..."
+        mspt_response = await self.rcon("mspt")
+        mspt = re.search(r":\s*\S*?\s*" + NUMBER + r"/", mspt_response)
+        return float(tps.group(1)), float(mspt.group(1)) if mspt else math.nan
+
+    # Forge: "Overall: Mean tick time: 1.234 ms. Mean TPS: 20.000"
+    async def probe_forge(self):
+        response = await self.rcon("forge tps")
+        match = re.search(
+            r"Overall.*?Mean tick time: " + NUMBER + r" ms.*?Mean TPS: " + NUMBER,
+            response,
+            re.DOTALL,
+        )
+        if not match:
+            return None
+        return float(match.group(2)), float(match.group(1))
+
+    # NeoForge: "Overall: 20.000 TPS (1.234 ms/tick)"
+    async def probe_neoforge(self):
+        response = await self.rcon("neoforge tps")
+        match = re.search(
+            r"Overall.*?" + NUMBER + r" TPS \(" + NUMBER + r" ms/tick", response
+        )
+        if not match:
+            return None
+        return float(match.group(1)), float(match.group(2))
+
+    # Vanilla 1.20.3+: "Average time per tick: 2.3ms (Target: 50.0ms)"
+    async def probe_vanilla(self):
+        response = await self.rcon("tick query")
+        match = re.search(
+            r"Average time per tick: " + NUMBER + r"ms \(Target: " + NUMBER, response
+        )
+        if not match:
+            return None
+        mspt, target = float(match.group(1)), float(match.group(2))
+        return 1000 / max(mspt, target), mspt
+
+    # EssentialsX: "Allocated memory: 2048 MB. Free memory: 1024 MB."
+    async def probe_essentials(self):
+        response = await self.rcon("gc")
+        allocated = re.search(r"Allocated memory: " + NUMBER, response)
+        free = re.search(r"Free memory: " + NUMBER, response)
+        if not allocated or not free:
+            return None
+        return float(allocated.group(1)) - float(free.group(1))
+
+    async def read_ticks(self):
+        if self.tick_probe is False:
+            return math.nan, math.nan  # Not supported by this server
+        if self.tick_probe:
+            result = await self.tick_probe()
+            if result:
+                return result
+
+        probes = [
+            self.probe_paper,
+            self.probe_forge,
+            self.probe_neoforge,
+            self.probe_vanilla,
+        ]
+        for probe in probes:
+            result = await probe()
+            if result:
+                self.tick_probe = probe
+                return result
+        self.tick_probe = False
+        return math.nan, math.nan
+
+    async def read_memory(self):
+        if self.memory_probe is False:
+            return math.nan  # Not supported by this server
+        memory = await self.probe_essentials()
+        self.memory_probe = memory is not None
+        return math.nan if memory is None else memory
+
+    async def read_players(self):
+        response = await self.rcon("list")
+        match = re.search(r"There are (\d+)", response)
+        return float(match.group(1)) if match else math.nan
+
+    @tasks.loop(seconds=30)  # Overwritten with config.METRICS_INTERVAL
+    async def sample(self):
+        try:
+            players = await self.read_players()
+            tps, mspt = await self.read_ticks()
+            memory = await self.read_memory()
+        except Exception as e:
+            logger.debug(f"Skipping metrics sample, server unreachable: {e}")
+            return
+
+        self.store.append((int(time.time()), tps, mspt, players, memory))
+
+    @sample.before_loop
+    async def before_sample(self):
+        await self.bot.wait_until_ready()
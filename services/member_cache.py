@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import discord
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MemberCache:
+    # Looks up members without needing the whole guild cached: discord.py's cache first,
+    # then the members remembered here, then the API. Remembered members are dropped
+    # least recently used first. In "seen" mode message authors are remembered as well.
+    def __init__(self, bot):
+        self.bot = bot
+        self.members = OrderedDict()  # (guild id, user id) -> Member
+
+    async def start(self):
+        if config.MEMBER_CACHE_MODE == "seen":
+            self.bot.add_listener(self.on_message)
+
+    async def stop(self):
+        self.bot.remove_listener(self.on_message)
+
+    async def on_message(self, message):
+        if isinstance(message.author, discord.Member):
+            self.remember(message.author)
+
+    def remember(self, member):
+        key = (member.guild.id, member.id)
+        self.members[key] = member
+        self.members.move_to_end(key)
+        while len(self.members) > config.MEMBER_CACHE_SIZE:
+            self.members.popitem(last=False)
+
+    async def get_member(self, guild, user_id):
+        if guild is None:
+            return None
+
+        member = guild.get_member(user_id)
+        if member:
+            return member
+
+        key = (guild.id, user_id)
+        member = self.members.get(key)
+        if member:
+            self.members.move_to_end(key)
+            return member
+
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        except discord.HTTPException as e:
+            logger.error(f"Error fetching member {user_id}: {e}")
+            return None
+        self.remember(member)
+        return member
@@ -1,5 +1,11 @@
 import os
+import io
+import gzip
+import time
 import asyncio
+from collections import deque
+from datetime import datetime
+import discord
 from discord.ext import tasks
 import config
 from services.server_status import ServerStatusService
@@ -11,23 +17,55 @@ logger = logging.getLogger(__name__)
 
 
 class MinecraftLogWatcher:
+    dependencies = [ServerStatusService]
+
     def __init__(self, bot):
         self.bot = bot
         self.log_file_path = config.LOG_FILE_PATH
         self.channel_id = config.CONSOLE_CHANNEL_ID
         self.last_known_size = self.get_log_size()  # Start with current file size
-        self.buffer = []  # Buffer for log changes
+        self.buffer = deque()  # Ring buffer for log changes
+        self.spool = deque(maxlen=50000)  # Lines spilled from the buffer during floods
+        self.dropped_lines = 0  # Lines lost because even the spool was full
         self.debounce_task = None  # Task for debouncing on_log_change
         self.debounce_time = 5  # Debounce time in seconds
-        self.message_limit = 20  # Limit to bundle multiple log entries
+        self.char_limit = 2000  # Discord's message length limit
+        self.messages_per_flush = 5  # Maximum messages sent per flush
         self.initial_load = True  # Flag to identify initial log processing
         self.max_buffer_size = 100  # Maximum size of the buffer
+        self.base_flush_interval = 5  # Flush interval in seconds when not rate limited
+        self.max_flush_interval = 30  # Upper bound when backing off
+        # A send blocking longer than this many seconds hit a rate limit
+        self.rate_limit_threshold = 1
         self.lock = asyncio.Lock()  # Lock to prevent concurrent on_log_change calls
+        self.flush_lock = asyncio.Lock()  # Keeps concurrent flushes in order
 
+    async def start(self):
         if self.log_file_path:
             self.watch_log.start()
             self.flush_buffer.start()  # Task to regularly flush the buffer
 
+    async def stop(self):
+        if self.debounce_task:
+            self.debounce_task.cancel()
+
+    # State kept when the service is hot-reloaded
+    def export_state(self):
+        return {
+            "last_known_size": self.last_known_size,
+            "buffer": self.buffer,
+            "spool": self.spool,
+            "dropped_lines": self.dropped_lines,
+            "initial_load": self.initial_load,
+        }
+
+    def import_state(self, state):
+        self.last_known_size = state["last_known_size"]
+        self.buffer = state["buffer"]
+        self.spool = state["spool"]
+        self.dropped_lines = state["dropped_lines"]
+        self.initial_load = state["initial_load"]
+
     def get_log_size(self):
         try:
             return os.stat(self.log_file_path).st_size
@@ -73,6 +111,8 @@ class MinecraftLogWatcher:
         try:
             logger.debug("Processing log entries...")
             new_lines = []  # Collect new log lines for bundling
+            players_changed = False  # Whether a join/leave changed the player set
+            status_service = self.bot.services.get(ServerStatusService)
 
             with open(self.log_file_path, "r") as file:
                 file.seek(self.last_known_size)
@@ -85,9 +125,16 @@ class MinecraftLogWatcher:
                         new_lines.append(stripped_line)
                         self.buffer.append(stripped_line)
 
-                        # Limit the buffer size to prevent excessive memory usage
+                        if status_service and status_service.handle_log_line(
+                            stripped_line
+                        ):
+                            players_changed = True
+
+                        # Spill the oldest lines to the spool instead of dropping them
                         if len(self.buffer) > self.max_buffer_size:
-                            self.buffer.pop(0)
+                            if len(self.spool) == self.spool.maxlen:
+                                self.dropped_lines += 1
+                            self.spool.append(self.buffer.popleft())
                         logger.debug(f"Added relevant line: {stripped_line}")
                     else:
                         logger.debug(f"Ignored line: {line.strip()}")
@@ -96,8 +143,8 @@ class MinecraftLogWatcher:
             if 0 < len(new_lines) <= 5:
                 await self.flush_buffer()
 
-            # Start debounce only if there are new relevant lines and not during initial load
-            if new_lines and not self.initial_load:
+            # Start debounce only if the player set changed and not during initial load
+            if players_changed and not self.initial_load:
                 if self.debounce_task and not self.debounce_task.done():
                     self.debounce_task.cancel()
                     logger.debug("Debounce timer reset due to new changes.")
@@ -118,8 +165,8 @@ class MinecraftLogWatcher:
             await asyncio.sleep(self.debounce_time)  # Wait for the debounce period
             async with self.lock:
                 logger.info("Debounce period elapsed, calling `on_log_change()`.")
-                await ServerStatusService(
-                    self.bot
+                await self.bot.services.get(
+                    ServerStatusService
                 ).on_log_change()  # Trigger the log change
                 logger.info("`on_log_change()` has been called successfully.")
         except asyncio.CancelledError:
@@ -129,21 +176,90 @@ class MinecraftLogWatcher:
         finally:
             self.debounce_task = None  # Reset the debounce task
 
-    @tasks.loop(seconds=5)  # Optimized frequency for buffer flushing
+    @tasks.loop(seconds=5)  # Adjusted at runtime, see adapt_flush_interval
     async def flush_buffer(self):
         # Processes the buffer either immediately or on a schedule
-        if self.buffer:
+        if not self.buffer and not self.spool:
+            return
+
+        async with self.flush_lock:
+            channel = self.bot.get_channel(self.channel_id)
+            if not channel:
+                return
+
+            logger.debug("Flushing the buffer...")
+            slowest_send = 0
+            messages = []
             try:
-                logger.debug("Flushing the buffer...")
-                channel = self.bot.get_channel(self.channel_id)
-                if channel:
-                    while self.buffer:
-                        batch = self.buffer[: self.message_limit]
-                        message = "\n".join(batch)
-                        await channel.send(message)
-                        self.buffer = self.buffer[self.message_limit :]
+                if self.spool:
+                    start = time.monotonic()
+                    await self.send_spool(channel)
+                    slowest_send = time.monotonic() - start
+
+                messages = self.pack_messages(self.messages_per_flush)
+                while messages:
+                    start = time.monotonic()
+                    await channel.send(messages[0])
+                    slowest_send = max(slowest_send, time.monotonic() - start)
+                    messages.pop(0)
             except Exception as e:
                 logger.error(f"Error sending messages to Discord: {e}")
+                # Put unsent lines back so they go out with the next flush
+                for message in reversed(messages):
+                    self.buffer.extendleft(reversed(message.split("\n")))
+
+            self.adapt_flush_interval(slowest_send)
+
+    def pack_messages(self, max_messages):
+        # Packs as many buffered lines as fit into each message
+        messages = []
+        current = []
+        length = 0
+        while self.buffer and len(messages) < max_messages:
+            line = self.buffer[0][: self.char_limit]
+            added = len(line) + (1 if current else 0)  # Newline separator
+            if length + added > self.char_limit:
+                messages.append("\n".join(current))
+                current = []
+                length = 0
+                continue
+            current.append(line)
+            length += added
+            self.buffer.popleft()
+
+        if current:
+            messages.append("\n".join(current))
+        return messages
+
+    async def send_spool(self, channel):
+        # Sends spilled lines as a compressed attachment
+        lines = len(self.spool)
+        data = gzip.compress(("\n".join(self.spool) + "\n").encode("utf-8"))
+        filename = f"console-{datetime.now().strftime('%Y%m%d-%H%M%S')}.log.gz"
+        dropped = (
+            f" {self.dropped_lines} more lines were dropped."
+            if self.dropped_lines
+            else ""
+        )
+        await channel.send(
+            f"Console is flooding, {lines} lines were spooled to a file.{dropped}",
+            file=discord.File(io.BytesIO(data), filename=filename),
+        )
+        self.spool.clear()
+        self.dropped_lines = 0
+
+    def adapt_flush_interval(self, slowest_send):
+        # discord.py reads the X-RateLimit headers itself and sleeps until the bucket
+        # resets, so a send that blocks for long means the channel bucket is exhausted
+        interval = self.flush_buffer.seconds
+        if slowest_send > self.rate_limit_threshold:
+            interval = min(interval * 2, self.max_flush_interval)
+        elif interval > self.base_flush_interval:
+            interval = max(interval / 2, self.base_flush_interval)
+
+        if interval != self.flush_buffer.seconds:
+            logger.info(f"Console flush interval changed to {interval} seconds.")
+            self.flush_buffer.change_interval(seconds=interval)
 
     @watch_log.before_loop
     async def before_watch_log(self):
@@ -0,0 +1,279 @@
+import re
+import time
+import bisect
+import asyncio
+import functools
+import logging
+from contextlib import contextmanager
+from aiohttp import web
+from discord.ext import tasks
+import config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is +Inf
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+LAG_INTERVAL = 0.1  # Seconds between lag probes, shorter blocks can go unnoticed
+KINDS = ("command", "event", "loop", "service")
+RETRY_PATTERN = re.compile(r"Retrying in (\d+(?:\.\d+)?) seconds")
+# Kept across a hot reload of the service
+STATE_KEYS = (
+    "histograms",
+    "lag",
+    "rate_limits",
+    "global_rate_limits",
+    "rate_limit_wait",
+    "started",
+)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0  # Sum of all observed seconds
+        self.count = 0
+        self.errors = 0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the percentile, capped by the maximum
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (self.max,), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+
+class RateLimitHandler(logging.Handler):
+    # discord.py only reports 429 waits through its log, so they are parsed from there.
+    # Waits for a bucket that ran empty before a 429 are only logged at DEBUG without
+    # a duration, so these counters cover 429 responses only.
+    def __init__(self, metrics):
+        super().__init__(level=logging.WARNING)
+        self.metrics = metrics
+
+    def emit(self, record):
+        match = RETRY_PATTERN.search(record.getMessage())
+        if not match:
+            return
+        if "Global" in record.msg:
+            self.metrics.global_rate_limits += 1
+        else:
+            self.metrics.rate_limits += 1
+            self.metrics.rate_limit_wait += float(match.group(1))
+
+
+# Times the block as a call of the given kind, does nothing while PerfMetrics is not loaded
+@contextmanager
+def timed(bot, kind, name):
+    metrics = bot.services.get(PerfMetrics)
+    if metrics is None:
+        yield
+        return
+    with metrics.measure(kind, name):
+        yield
+
+
+# Wraps a tasks.Loop so every iteration is timed, safe to call more than once
+def instrument_loop(bot, loop, name):
+    coro = loop.coro
+    if getattr(coro, "perf_instrumented", False):
+        return
+
+    @functools.wraps(coro)
+    async def wrapper(*args, **kwargs):
+        with timed(bot, "loop", name):
+            await coro(*args, **kwargs)
+
+    wrapper.perf_instrumented = True
+    loop.coro = wrapper
+
+
+class PerfMetrics:
+    # Latency histograms and error counts for app commands, event listeners, task loops
+    # and service calls (see timed), plus event loop lag and Discord rate limit waits.
+    # Shown by /perf and, if PERF_METRICS_PORT is set, served as Prometheus text.
+    def __init__(self, bot):
+        self.bot = bot
+        self.histograms = {kind: {} for kind in KINDS}  # Kind -> name -> Histogram
+        self.lag = Histogram()
+        self.last_lag = 0.0
+        self.rate_limits = 0
+        self.global_rate_limits = 0
+        self.rate_limit_wait = 0.0  # Seconds spent waiting on 429s
+        self.started = time.time()
+        self.rate_limit_handler = RateLimitHandler(self)
+        self.original_run_event = None
+        self.original_on_error = None
+        self.runner = None
+
+    async def start(self):
+        tree = self.bot.tree
+        tree.interaction_check = self.interaction_check
+        self.original_on_error = tree.on_error
+        tree.on_error = self.on_app_command_error
+        self.bot.add_listener(self.on_app_command_completion)
+
+        # Every listener runs through Client._run_event, there is no public hook for it
+        self.original_run_event = self.bot._run_event
+        self.bot._run_event = self.run_event
+
+        logging.getLogger("discord.http").addHandler(self.rate_limit_handler)
+        self.probe_lag.start()
+
+        if config.PERF_METRICS_PORT:
+            app = web.Application()
+            app.router.add_get("/metrics", self.serve_metrics)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            # Only reachable locally, there is no authentication
+            await web.TCPSite(
+                self.runner, "127.0.0.1", config.PERF_METRICS_PORT
+            ).start()
+            logger.info(f"Serving metrics on port {config.PERF_METRICS_PORT}.")
+
+    async def stop(self):
+        tree = self.bot.tree
+        del tree.interaction_check  # Back to the class implementation
+        tree.on_error = self.original_on_error
+        self.bot.remove_listener(self.on_app_command_completion)
+        self.bot._run_event = self.original_run_event
+        logging.getLogger("discord.http").removeHandler(self.rate_limit_handler)
+        if self.runner:
+            await self.runner.cleanup()
+
+    def export_state(self):
+        return {key: getattr(self, key) for key in STATE_KEYS}
+
+    def import_state(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def histogram(self, kind, name):
+        histograms = self.histograms[kind]
+        if name not in histograms:
+            histograms[name] = Histogram()
+        return histograms[name]
+
+    @contextmanager
+    def measure(self, kind, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.histogram(kind, name).observe(time.perf_counter() - start, error=True)
+            raise
+        self.histogram(kind, name).observe(time.perf_counter() - start)
+
+    # App commands: the start time rides along on the interaction until one of the
+    # completion or error hooks records it
+    async def interaction_check(self, interaction):
+        interaction.extras["perf_start"] = time.perf_counter()
+        return True
+
+    async def on_app_command_completion(self, interaction, command):
+        self.record_command(interaction, error=False)
+
+    async def on_app_command_error(self, interaction, error):
+        self.record_command(interaction, error=True)
+        await self.original_on_error(interaction, error)
+
+    def record_command(self, interaction, error):
+        start = interaction.extras.pop("perf_start", None)
+        if start is not None and interaction.command:
+            name = f"/{interaction.command.qualified_name}"
+            self.histogram("command", name).observe(time.perf_counter() - start, error)
+
+    async def run_event(self, coro, event_name, *args, **kwargs):
+        async def timed_coro(*args, **kwargs):
+            with self.measure("event", coro.__qualname__):
+                await coro(*args, **kwargs)
+
+        await self.original_run_event(timed_coro, event_name, *args, **kwargs)
+
+    # Runs back to back, the sleep is the probe: anything blocking the event loop
+    # makes it wake up late. Also picks up the loops of services started since.
+    @tasks.loop()
+    async def probe_lag(self):
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        self.last_lag = max(0.0, time.perf_counter() - start - LAG_INTERVAL)
+        self.lag.observe(self.last_lag)
+        self.instrument_loops()
+
+    def instrument_loops(self):
+        for owner in [*self.bot.services, *self.bot.cogs.values()]:
+            if owner is self:
+                continue
+            for attribute, value in vars(owner).items():
+                if isinstance(value, tasks.Loop):
+                    name = f"{type(owner).__name__}.{attribute}"
+                    instrument_loop(self.bot, value, name)
+
+    async def serve_metrics(self, request):
+        return web.Response(text=self.prometheus_text())
+
+    def prometheus_text(self):
+        lines = [
+            "# TYPE servy_latency_seconds histogram",
+            "# TYPE servy_errors_total counter",
+        ]
+        for kind, histograms in self.histograms.items():
+            for name, histogram in histograms.items():
+                labels = f'kind="{kind}",name="{escape_label(name)}"'
+                lines += histogram_lines("servy_latency_seconds", labels, histogram)
+                lines.append(f"servy_errors_total{{{labels}}} {histogram.errors}")
+
+        lines.append("# TYPE servy_event_loop_lag_seconds histogram")
+        lines += histogram_lines("servy_event_loop_lag_seconds", "", self.lag)
+        lines += [
+            "# TYPE servy_rate_limit_429_total counter",
+            f'servy_rate_limit_429_total{{scope="route"}} {self.rate_limits}',
+            f'servy_rate_limit_429_total{{scope="global"}} {self.global_rate_limits}',
+            "# TYPE servy_rate_limit_429_wait_seconds_total counter",
+            f"servy_rate_limit_429_wait_seconds_total {self.rate_limit_wait}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def histogram_lines(metric, labels, histogram):
+    separator = "," if labels else ""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {histogram.total}")
+    lines.append(f"{metric}_count{suffix} {histogram.count}")
+    return lines
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
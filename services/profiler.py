@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+MAX_SESSION_SECONDS = 30 * 60  # Sampling stops by itself after this long
+
+
+class SamplingProfiler:
+    # Samples the stack of the event loop thread from a background thread. The result
+    # is written in the collapsed format ("outer;inner count" per line) that
+    # flamegraph.pl and speedscope read. Idle time shows up as the loop's select call.
+    def __init__(self, bot):
+        self.bot = bot
+        self.loop_thread_id = None
+        self.samples = Counter()  # Collapsed stack -> number of samples
+        self.started = None
+        self.stopping = threading.Event()
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    async def stop(self):
+        if self.running:
+            self.stopping.set()
+            self.thread.join()
+
+    def start_session(self):
+        if self.running:
+            raise RuntimeError("A profiling session is already running.")
+        self.loop_thread_id = threading.get_ident()
+        self.samples = Counter()
+        self.started = datetime.now()
+        self.stopping.clear()
+        self.thread = threading.Thread(
+            target=self.sample, name="sampling-profiler", daemon=True
+        )
+        self.thread.start()
+
+    # Stops sampling and writes the profile, returns its path and the number of samples
+    async def stop_session(self):
+        if not self.running:
+            raise RuntimeError("No profiling session is running.")
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+        os.makedirs(config.PROFILES_PATH, exist_ok=True)
+        path = os.path.join(
+            config.PROFILES_PATH, f"{self.started.strftime('%Y%m%d-%H%M%S')}.folded"
+        )
+        await asyncio.to_thread(self.write, path, self.samples)
+        return path, sum(self.samples.values())
+
+    @staticmethod
+    def write(path, samples):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def sample(self):
+        deadline = time.monotonic() + MAX_SESSION_SECONDS
+        while not self.stopping.wait(SAMPLE_INTERVAL):
+            if time.monotonic() > deadline:
+                logger.warning(
+                    "Profiling session hit its time limit, sampling stopped."
+                )
+                return
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.samples[self.collapse(frame)] += 1
+
+    @staticmethod
+    def collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        # Readers split the count off at the last space, so spaces in names are fine
+        return ";".join(reversed(names))
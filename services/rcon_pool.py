@@ -0,0 +1,149 @@
+import asyncio
+import struct
+import itertools
+import config
+from services.perf import timed
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Packet types of the Source RCON protocol used by Minecraft
+LOGIN_TYPE = 3
+COMMAND_TYPE = 2
+# Minecraft answers packets of unknown types with "Unknown request" and the same id.
+# It handles a client's packets in order, so that answer marks the end of a response.
+MARKER_TYPE = 0
+
+
+class RconError(Exception):
+    pass
+
+
+class RconNotSentError(RconError):
+    # The command never reached the server, so it is safe to send it again
+    pass
+
+
+class RconConnection:
+    # A single asyncio RCON connection. MCRcon cannot be used off the main thread
+    # because it installs a SIGALRM handler, so the protocol is spoken directly.
+    def __init__(self, host, port, password, timeout=5):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.request_ids = itertools.count(1)
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        request_id = next(self.request_ids)
+        await self.send_packet(request_id, LOGIN_TYPE, self.password)
+        response_id, _, _ = await self.read_packet()
+        if response_id != request_id:
+            self.close()
+            raise RconError("RCON login failed, check RCON_PASSWORD")
+
+    # Any error after the command was sent leaves the connection in an unknown state,
+    # the caller has to close it
+    async def command(self, command):
+        if self.reader.at_eof() or self.writer.is_closing():
+            raise RconNotSentError("RCON connection was closed by the server")
+        request_id = next(self.request_ids)
+        marker_id = next(self.request_ids)
+        try:
+            self.writer.write(
+                self.pack(request_id, COMMAND_TYPE, command)
+                + self.pack(marker_id, MARKER_TYPE, "")
+            )
+            await self.writer.drain()
+        except OSError as e:
+            raise RconNotSentError(f"Could not send RCON command: {e}") from e
+
+        parts = []
+        while True:
+            response_id, _, payload = await self.read_packet()
+            if response_id == marker_id:
+                return "".join(parts)
+            if response_id != request_id:
+                raise RconError(f"Unexpected RCON response id {response_id}")
+            parts.append(payload)
+
+    async def send_packet(self, request_id, packet_type, payload):
+        self.writer.write(self.pack(request_id, packet_type, payload))
+        await self.writer.drain()
+
+    @staticmethod
+    def pack(request_id, packet_type, payload):
+        data = struct.pack("<ii", request_id, packet_type) + payload.encode("utf-8")
+        data += b"\x00\x00"
+        return struct.pack("<i", len(data)) + data
+
+    async def read_packet(self):
+        # One timeout for the whole packet, a timeout never leaves half a packet behind
+        # on a connection that is used again, see command
+        async def read():
+            (length,) = struct.unpack("<i", await self.reader.readexactly(4))
+            return await self.reader.readexactly(length)
+
+        data = await asyncio.wait_for(read(), self.timeout)
+        request_id, packet_type = struct.unpack("<ii", data[:8])
+        return request_id, packet_type, data[8:-2].decode("utf-8", errors="replace")
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+
+
+class RconPool:
+    def __init__(self, bot):
+        self.bot = bot
+        self.size = 2  # Maximum number of concurrent RCON connections
+        self.idle = []  # Connected, currently unused connections
+        self.semaphore = asyncio.Semaphore(self.size)
+
+    # Sends a command over a pooled connection, raises if the server is unreachable
+    async def command(self, command):
+        # The verb only, arguments would make every command its own histogram
+        with timed(self.bot, "service", f"rcon {command.split(' ', 1)[0]}"):
+            return await self.send(command)
+
+    async def send(self, command):
+        async with self.semaphore:
+            # Idle connections may have died with a server restart. Only a command
+            # that was never sent is tried again, anything else could run it twice.
+            while self.idle:
+                connection = self.idle.pop()
+                try:
+                    response = await connection.command(command)
+                except RconNotSentError:
+                    logger.debug("Dropping stale RCON connection.")
+                    connection.close()
+                    continue
+                except BaseException:
+                    connection.close()
+                    raise
+                self.idle.append(connection)
+                return response
+
+            connection = RconConnection(
+                config.RCON_IP, config.RCON_PORT, config.RCON_PASSWORD
+            )
+            try:
+                await connection.connect()
+                response = await connection.command(command)
+            except BaseException:
+                connection.close()
+                raise
+            self.idle.append(connection)
+            return response
+
+    async def stop(self):
+        for connection in self.idle:
+            connection.close()
+        self.idle.clear()
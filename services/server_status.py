@@ -1,46 +1,124 @@
+import re
 import discord
-from mcrcon import MCRcon
-import config
+from discord.ext import tasks
 import asyncio
+from services.rcon_pool import RconPool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Log lines look like "[12:00:00] [Server thread/INFO]: Steve joined the game" (vanilla)
+# or "[12:00:00 INFO]: Steve left the game" (Paper)
+PLAYER_EVENT_PATTERN = re.compile(
+    r"\]: (?P<name>\w{1,16}) (?P<event>joined|left) the game"
+)
+SERVER_STARTED_PATTERN = re.compile(r"\]: Done \(")
+SERVER_STOPPING_PATTERN = re.compile(r"\]: Stopping (the )?server")
+COLOR_CODE_PATTERN = re.compile(r"§.")
 
 
 class ServerStatusService:
+    dependencies = [RconPool]
+
     def __init__(self, bot):
         self.bot = bot
         self.last_status = None  # Variable to store the last known server status
+        self.online = False  # Whether the server is reachable
+        self.players = set()  # Names of the players currently online
         self.lock = asyncio.Lock()  # Lock to prevent concurrent updates
-        self.bot.loop.create_task(self.update_presence())  # Check status on startup
 
-    # Function to retrieve the server status
-    async def get_server_status(self):
+    async def start(self):
+        self.reconcile.start()  # Check status on startup and periodically after that
+
+    # Function to retrieve the online players, returns None if the server is offline
+    async def fetch_players(self):
         try:
+            response = await self.bot.services.get(RconPool).command("list")
+        except Exception:
+            return None
 
-            def rcon_command():
-                with MCRcon(
-                    config.RCON_IP, config.RCON_PASSWORD, port=config.RCON_PORT
-                ) as mcr:
-                    response = mcr.command("list")
-                    return response
-
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, rcon_command
-            )
-
-            if "There are 0" in response:
-                return "Online, no players"
-            elif "There are" in response:
-                num_players = response.split()[2]  # Extract the number of players
-                return f"Online, {num_players} players"
+        return self.parse_player_list(response)
+
+    @staticmethod
+    def parse_player_list(response):
+        # "There are 2 of a max of 20 players online: Steve, Alex"
+        response = COLOR_CODE_PATTERN.sub("", response)
+        if ":" not in response:
+            return set()
+        names = response.split(":", 1)[1].replace("\n", ",").split(",")
+        return {name.strip() for name in names if name.strip()}
+
+    def handle_log_line(self, line):
+        # Applies a log line to the player set, returns True if the status changed
+        match = PLAYER_EVENT_PATTERN.search(line)
+        if match:
+            name = match.group("name")
+            if match.group("event") == "joined":
+                changed = name not in self.players or not self.online
+                self.players.add(name)
             else:
-                return "Online"
-        except Exception:
+                changed = name in self.players
+                self.players.discard(name)
+            self.online = True
+            return changed
+
+        if SERVER_STARTED_PATTERN.search(line):
+            changed = not self.online
+            self.online = True
+            self.players.clear()
+            return changed
+
+        if SERVER_STOPPING_PATTERN.search(line):
+            changed = self.online
+            self.online = False
+            self.players.clear()
+            return changed
+
+        return False
+
+    def get_server_status(self):
+        if not self.online:
             return "Offline"
+        if not self.players:
+            return "Online, no players"
+        return f"Online, {len(self.players)} players"
+
+    # State kept when the service is hot-reloaded
+    def export_state(self):
+        return {
+            "last_status": self.last_status,
+            "online": self.online,
+            "players": self.players,
+        }
+
+    def import_state(self, state):
+        self.last_status = state["last_status"]
+        self.online = state["online"]
+        self.players = state["players"]
+
+    # Reconciles the player set with the server, log events keep it current in between
+    @tasks.loop(minutes=5)
+    async def reconcile(self):
+        players = await self.fetch_players()
+        if players is None:
+            self.online = False
+            self.players.clear()
+        else:
+            if self.online and players != self.players:
+                logger.info("Player list drifted from log events, reconciling.")
+            self.online = True
+            self.players = players
+        await self.update_presence()
+
+    @reconcile.before_loop
+    async def before_reconcile(self):
+        await self.bot.wait_until_ready()
 
     # Method to update the bot's presence based on the server status
     async def update_presence(self):
         await self.bot.wait_until_ready()  # Wait until the bot is ready
         async with self.lock:
-            status = await self.get_server_status()
+            status = self.get_server_status()
 
             if status != self.last_status:
                 self.last_status = status  # Update the last known status
@@ -1,15 +1,11 @@
 import os
-import pickle
 import random
 import json
+import shutil
 import numpy as np
-import cv2
-from collections import deque
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Input
-from tensorflow.keras.optimizers import Adam
+from concurrent.futures import ThreadPoolExecutor
 
+# TensorFlow and OpenCV take seconds to import, they are imported on first use
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 VERBOSE = True
 
@@ -19,6 +15,74 @@ def verbose_print(message):
         print(message)
 
 
+# Farbbereiche im HSV-Raum (OpenCV: Farbton 0-180), Rot liegt an beiden Enden der Farbtonskala
+COLOR_HUE_RANGES = {
+    'green': [(35, 85)],
+    'yellow': [(20, 35)],
+    'red': [(0, 10), (170, 180)],
+    'blue': [(100, 130)],
+}
+COLOR_BITS = {color: 1 << i for i, color in enumerate(COLOR_HUE_RANGES)}
+MIN_SATURATION = MIN_VALUE = 50
+
+# Farbton -> Bitmaske aller Farben, zu denen er gehört (Bereiche dürfen sich überschneiden)
+HUE_LUT = np.zeros(256, dtype=np.uint8)
+for _color, _ranges in COLOR_HUE_RANGES.items():
+    for _low, _high in _ranges:
+        HUE_LUT[_low:_high + 1] |= COLOR_BITS[_color]
+
+
+def extract_sheet(image_path, output_dir=None):
+    """ Für den Prozesspool: extrahiert die Karten eines Bildes als Liste von (Dateiname, Bild). """
+    return CardExtractor(output_dir or 'cards').extract_card_images(image_path)
+
+
+class CardAtlas:
+    """
+        Alle Kartenbilder in einem zusammenhängenden uint8-Array. Der Index enthält für jede Karte
+        Offset, Höhe und Breite, die Bilder sind BGRA-Ansichten in das Array ohne Kopie.
+    """
+
+    INDEX_DTYPE = np.dtype([('offset', np.int64), ('height', np.int32), ('width', np.int32)])
+
+    def __init__(self, data, index, names):
+        self.data = data
+        self.index = index
+        self.names = list(names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_images(cls, named_images):
+        names, images = zip(*named_images) if named_images else ((), ())
+        index = np.zeros(len(images), dtype=cls.INDEX_DTYPE)
+        index['height'] = [image.shape[0] for image in images]
+        index['width'] = [image.shape[1] for image in images]
+        sizes = index['height'].astype(np.int64) * index['width'] * 4
+        index['offset'] = np.concatenate([[0], np.cumsum(sizes)[:-1]]) if len(images) else []
+
+        data = np.empty(int(sizes.sum()), dtype=np.uint8)
+        for (offset, height, width), image in zip(index, images):
+            data[offset:offset + height * width * 4].reshape(height, width, 4)[:] = image
+        return cls(data, index, names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, key):
+        """ Kartenbild nach Position oder Dateiname. """
+        i = self.positions[key] if isinstance(key, str) else key
+        offset, height, width = self.index[i]
+        return self.data[offset:offset + int(height) * int(width) * 4].reshape(height, width, 4)
+
+    def save(self, filename='card_atlas.npz'):
+        np.savez(filename, data=self.data, index=self.index, names=np.array(self.names))
+
+    @classmethod
+    def load(cls, filename='card_atlas.npz'):
+        with np.load(filename) as archive:
+            return cls(archive['data'], archive['index'], [str(name) for name in archive['names']])
+
+
 class CardExtractor:
     def __init__(self, output_dir: str = 'cards'):
         self.output_dir = output_dir
@@ -27,62 +91,92 @@ class CardExtractor:
                        'skip', 'reverse', 'draw2', 'wild', 'draw4']
 
     def extract_cards(self, image_path: str):
-        # Bild laden
-        img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
-        if img is None:
-            raise ValueError(f"Could not load image from {image_path}")
+        import cv2
 
         # Ausgabeverzeichnis erstellen, falls es nicht existiert
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # Bild in HSV-Farbraum konvertieren für bessere Farbsegmentierung
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        extracted_cards = []
+        for filename, card_img in self.extract_card_images(image_path):
+            # Speichern mit Alpha-Kanal
+            cv2.imwrite(os.path.join(self.output_dir, filename), card_img)
+            extracted_cards.append(card_img)
+            verbose_print(f"Extracted card: {filename}")
 
-        # Farbgrenzen definieren
-        color_ranges = {
-            'green': ([35, 50, 50], [85, 255, 255]),
-            'yellow': ([20, 50, 50], [35, 255, 255]),
-            'red1': ([0, 50, 50], [10, 255, 255]),
-            'red2': ([170, 50, 50], [180, 255, 255]),
-            'blue': ([100, 50, 50], [130, 255, 255])
-        }
+        return extracted_cards
 
-        extracted_cards = []
-        color_masks = {}
+    def extract_batch(self, image_paths, processes=None, write_files=False):
+        """
+            Extrahiert die Karten vieler Bilder, verteilt auf einen Prozesspool, und gibt sie als
+            CardAtlas zurück. Mit processes=0 läuft alles im aktuellen Prozess.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
 
-        # Masken für jede Farbe erstellen
-        for color, (lower, upper) in color_ranges.items():
-            lower = np.array(lower)
-            upper = np.array(upper)
-            mask = cv2.inRange(hsv, lower, upper)
+        if processes == 0:
+            results = [self.extract_card_images(path) for path in image_paths]
+        else:
+            with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(extract_sheet, image_paths))
+
+        # Gleichnamige Karten späterer Bilder bekommen ein Präfix, statt frühere zu überschreiben
+        named_images = []
+        for sheet, cards in enumerate(results):
+            for filename, card_img in cards:
+                named_images.append((filename if sheet == 0 else f"{sheet}_{filename}", card_img))
 
-            if color == 'red1':
-                mask2 = cv2.inRange(hsv, np.array([170, 50, 50]), np.array([180, 255, 255]))
-                mask = cv2.bitwise_or(mask, mask2)
+        if write_files:
+            import cv2
 
-            color_masks[color] = mask
+            os.makedirs(self.output_dir, exist_ok=True)
+            for filename, card_img in named_images:
+                cv2.imwrite(os.path.join(self.output_dir, filename), card_img)
+        return CardAtlas.from_images(named_images)
+
+    @staticmethod
+    def build_color_masks(img):
+        """
+            Alle Farbmasken aus einer einzigen HSV-Umrechnung: Der Farbton wird über HUE_LUT in eine
+            Bitmaske übersetzt, Sättigung und Helligkeit werden einmal für alle Farben geprüft.
+        """
+        import cv2
+
+        # Bild in HSV-Farbraum konvertieren für bessere Farbsegmentierung
+        hsv = cv2.cvtColor(img[:, :, :3], cv2.COLOR_BGR2HSV)
+        bright = cv2.inRange(hsv, (0, MIN_SATURATION, MIN_VALUE), (255, 255, 255))
+        bits = cv2.bitwise_and(cv2.LUT(hsv[:, :, 0], HUE_LUT), bright)
+        return {color: cv2.compare(bits & bit, 0, cv2.CMP_GT) for color, bit in COLOR_BITS.items()}
+
+    def extract_card_images(self, image_path):
+        """ Schneidet die Karten eines Bildes aus, gibt (Dateiname, BGRA-Bild) zurück ohne zu schreiben. """
+        import cv2
+
+        # Bild laden
+        img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise ValueError(f"Could not load image from {image_path}")
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+        color_masks = self.build_color_masks(img)
 
         # Bildgröße ermitteln
         height, width = img.shape[:2]
         expected_card_height = height // 4
         expected_card_width = width // 15
 
+        cards = []
         # Für jede Farbreihe
-        for color_idx, color in enumerate(['green', 'yellow', 'red1', 'blue']):
-            mask = color_masks[color if color != 'red1' else 'red1']
-
+        for color_idx, color in enumerate(self.colors):
             # Konturen in der Maske finden
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            contours, _ = cv2.findContours(color_masks[color], cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            if len(contours) > 15:  # Zu viele (kleine) Konturen, keine Kartenreihe
+                continue
 
             # Konturen nach x-Koordinate sortieren
-            sorted_contours = sorted(contours, key=lambda c: cv2.boundingRect(c)[0])
-
-            for card_idx, contour in enumerate(sorted_contours):
-                if len(sorted_contours) > 15:  # Überspringe zu kleine Konturen
-                    continue
-
-                x, y, w, h = cv2.boundingRect(contour)
+            boxes = sorted((cv2.boundingRect(contour) for contour in contours), key=lambda box: box[0])
 
+            for card_idx, (x, y, w, h) in enumerate(boxes):
                 # Kartengrößen-Check
                 if w < expected_card_width * 0.5 or h < expected_card_height * 0.5:
                     continue
@@ -97,32 +191,52 @@ class CardExtractor:
 
                 # Bestimme Kartentyp und Dateinamen
                 if card_idx < 13:
-                    color_name = self.colors[color_idx]
-                    value = self.values[card_idx]
-                    filename = f"{color_name}_{value}.png"
+                    filename = f"{self.colors[color_idx]}_{self.values[card_idx]}.png"
                 else:
-                    value = self.values[card_idx]
-                    filename = f"wild_{value}.png"
+                    filename = f"wild_{self.values[card_idx]}.png"
 
-                filepath = os.path.join(self.output_dir, filename)
+                if card_img.shape[-1] != 4:
+                    card_img = cv2.cvtColor(card_img, cv2.COLOR_BGR2BGRA)
+                cards.append((filename, np.ascontiguousarray(card_img)))
 
-                # Speichern mit Alpha-Kanal
-                if card_img.shape[-1] == 4:
-                    cv2.imwrite(filepath, card_img)
-                else:
-                    card_rgba = cv2.cvtColor(card_img, cv2.COLOR_BGR2BGRA)
-                    cv2.imwrite(filepath, card_rgba)
+        return cards
 
-                extracted_cards.append(card_img)
-                verbose_print(f"Extracted card: {filename}")
 
-        return extracted_cards
+# Kartentypen: 4 Farben x 13 Werte, danach Wild und +4
+CARD_COLORS = ["Rot", "Gelb", "Grün", "Blau"]
+CARD_VALUES = ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "Aussetzen", "Richtungswechsel", "+2"]
+NUM_CARD_TYPES = 54
+WILD, WILD_DRAW4 = 52, 53
+SKIP, REVERSE, DRAW2 = 10, 11, 12
+
+TYPE_COLOR = np.array([t // 13 for t in range(52)] + [-1, -1])  # -1: Farbe wird beim Ausspielen gewählt
+TYPE_VALUE = np.array([t % 13 for t in range(52)] + [-1, -1])
+DECK_COUNTS = np.array([1 if t % 13 == 0 else 2 for t in range(52)] + [4, 4], dtype=np.int16)
+CARD_TYPES = {(color, value): c * 13 + v for c, color in enumerate(CARD_COLORS) for v, value in enumerate(CARD_VALUES)}
+CARD_TYPES["Wild"], CARD_TYPES["+4"] = WILD, WILD_DRAW4
+
+# Projektion auf die 52 Eingänge des Netzes, genau wie NeuralNet.get_card_index (inkl. Überschneidungen)
+NN_INDEX = np.array([(t // 13) * 12 + t % 13 for t in range(52)] + [48, 49])
+NN_PROJECTION = np.zeros((NUM_CARD_TYPES, 52), dtype=np.float32)
+NN_PROJECTION[np.arange(NUM_CARD_TYPES), NN_INDEX] = 1
+
+# PLAYABLE[oberste Karte * 4 + aktuelle Farbe, Karte]
+PLAYABLE = np.zeros((NUM_CARD_TYPES * 4, NUM_CARD_TYPES), dtype=np.bool_)
+for _top in range(NUM_CARD_TYPES):
+    for _color in range(4):
+        PLAYABLE[_top * 4 + _color] = ((TYPE_COLOR == -1) | (TYPE_COLOR == _color) |
+                                       ((TYPE_VALUE == TYPE_VALUE[_top]) & (TYPE_VALUE >= 0)))
 
 
 class Card:
+    __slots__ = ("color", "value", "type", "index")
+
     def __init__(self, color, value):
         self.color = color
         self.value = value
+        # Kartentyp (0-53) und Eingang des Netzes (0-51) werden einmal nachgeschlagen statt bei jeder Kodierung
+        self.type = CARD_TYPES[value] if value in ("Wild", "+4") else CARD_TYPES[color, value]
+        self.index = int(NN_INDEX[self.type])
 
     def __repr__(self):
         return f"{self.color or 'Wild'} {self.value}"
@@ -167,16 +281,481 @@ class Deck:
         if len(discard_pile) <= 1:
             return
         self.cards = discard_pile[:-1]
+        for card in self.cards:
+            if card.type >= WILD:
+                card.color = None  # Die beim Ausspielen gewählte Farbe gilt nicht mehr
         random.shuffle(self.cards)
         top_card = discard_pile[-1]
         discard_pile.clear()
         discard_pile.append(top_card)
 
 
+class VectorizedUnoEnv:
+    """
+        Spielt viele Uno-Partien gleichzeitig. Hände, Nachzieh- und Ablagestapel sind Zählarrays über
+        die 54 Kartentypen, sodass alle Partien mit NumPy-Operationen in einem Schritt weiterlaufen.
+
+        Regeln: +2 und +4 lassen den nächsten Spieler ziehen und aussetzen, Aussetzen überspringt
+        den nächsten Spieler, Richtungswechsel dreht die Richtung (bei zwei Spielern wie Aussetzen).
+        Beendete Partien werden automatisch neu gestartet.
+    """
+
+    def __init__(self, num_games, num_players=2, seed=None):
+        self.num_games = num_games
+        self.num_players = num_players
+        self.rng = np.random.default_rng(seed)
+        self.games = np.arange(num_games)
+        self.hands = np.zeros((num_games, num_players, NUM_CARD_TYPES), dtype=np.int16)
+        self.draw_piles = np.zeros((num_games, NUM_CARD_TYPES), dtype=np.int16)
+        self.discard_piles = np.zeros((num_games, NUM_CARD_TYPES), dtype=np.int16)
+        self.top_cards = np.zeros(num_games, dtype=np.int64)
+        self.top_colors = np.zeros(num_games, dtype=np.int64)
+        self.current_players = np.zeros(num_games, dtype=np.int64)
+        self.directions = np.ones(num_games, dtype=np.int64)
+        self.reset_games(self.games)
+
+    def reset_games(self, games):
+        """ Startet die angegebenen Partien neu. """
+        if not len(games):
+            return
+        self.hands[games] = 0
+        self.draw_piles[games] = DECK_COUNTS
+        self.discard_piles[games] = 0
+        self.current_players[games] = 0
+        self.directions[games] = 1
+        for _ in range(7):
+            for player in range(self.num_players):
+                self.draw_cards(games, np.full(len(games), player))
+
+        first_cards = self.take_cards(games)
+        self.discard_piles[games, first_cards] += 1
+        self.set_top_cards(games, first_cards)
+
+    def take_cards(self, games):
+        """ Zieht je eine zufällige Karte aus den Nachziehstapeln, -1 wenn keine Karte mehr da ist. """
+        empty = games[self.draw_piles[games].sum(axis=1) == 0]
+        if len(empty):
+            # Ablagestapel bis auf die oberste Karte wieder einmischen
+            self.draw_piles[empty] += self.discard_piles[empty]
+            self.draw_piles[empty, self.top_cards[empty]] -= 1
+            self.discard_piles[empty] = 0
+            self.discard_piles[empty, self.top_cards[empty]] = 1
+
+        counts = self.draw_piles[games]
+        totals = counts.sum(axis=1)
+        picks = (self.rng.random(len(games)) * totals).astype(np.int64)
+        cards = (counts.cumsum(axis=1) > picks[:, None]).argmax(axis=1)
+        cards[totals == 0] = -1
+        has_card = cards >= 0
+        self.draw_piles[games[has_card], cards[has_card]] -= 1
+        return cards
+
+    def draw_cards(self, games, players, count=1):
+        for _ in range(count):
+            cards = self.take_cards(games)
+            has_card = cards >= 0
+            self.hands[games[has_card], players[has_card], cards[has_card]] += 1
+
+    def set_top_cards(self, games, cards):
+        self.top_cards[games] = cards
+        colors = TYPE_COLOR[cards]
+        wild = colors < 0
+        colors[wild] = self.rng.integers(0, 4, size=wild.sum())
+        self.top_colors[games] = colors
+
+    def current_hands(self):
+        return self.hands[self.games, self.current_players]
+
+    def encode_states(self):
+        """ Kodiert alle Partien wie UnoGame.encode_state als (num_games, 156)-Matrix. """
+        states = np.zeros((self.num_games, 156), dtype=np.float32)
+        states[:, :52] = self.current_hands() @ NN_PROJECTION
+        states[self.games, 52 + NN_INDEX[self.top_cards]] = 1
+        states[:, 104:] = self.discard_piles @ NN_PROJECTION
+        return states
+
+    def valid_action_mask(self):
+        return (self.current_hands() > 0) & PLAYABLE[self.top_cards * 4 + self.top_colors]
+
+    def select_actions(self, states, q_function, epsilon=0.0):
+        """
+            Wählt für jede Partie einen Kartentyp (-1 für Karte ziehen). Alle gültigen Aktionen aller
+            Partien werden in einem einzigen Aufruf von q_function bewertet.
+        """
+        valid = self.valid_action_mask()
+        actions = np.full(self.num_games, -1, dtype=np.int64)
+        has_valid = valid.any(axis=1)
+
+        # Exploration: zufällige gültige Karte
+        explore = has_valid & (self.rng.random(self.num_games) < epsilon)
+        random_scores = np.where(valid[explore], self.rng.random((explore.sum(), NUM_CARD_TYPES)), -1)
+        actions[explore] = random_scores.argmax(axis=1)
+
+        games, cards = np.nonzero(valid & (has_valid & ~explore)[:, None])
+        if len(games):
+            batch = np.zeros((len(games), 208), dtype=np.float32)
+            batch[:, :156] = states[games]
+            batch[np.arange(len(games)), 156 + NN_INDEX[cards]] = 1
+            q_values = np.asarray(q_function(batch)).reshape(-1)
+
+            # Beste Aktion je Partie: nach Partie und absteigendem Q-Wert sortieren, ersten Eintrag nehmen
+            order = np.lexsort((-q_values, games))
+            _, first = np.unique(games[order], return_index=True)
+            actions[games[order][first]] = cards[order][first]
+        return actions
+
+    def step(self, actions):
+        """
+            Führt für jede Partie eine Aktion aus.
+            Gibt (states, nn_actions, rewards, next_states, dones, next_valid) als Arrays zurück,
+            nn_actions und next_valid im Index des Netzes (-1 für Karte ziehen).
+        """
+        states = self.encode_states()
+        games = self.games
+        players = self.current_players.copy()
+        play = actions >= 0
+        cards = np.where(play, actions, 0)
+        played_games = games[play]
+        played_cards = cards[play]
+
+        # Karten ziehen
+        self.draw_cards(games[~play], players[~play])
+
+        # Karten ausspielen
+        self.hands[played_games, players[play], played_cards] -= 1
+        self.discard_piles[played_games, played_cards] += 1
+        self.set_top_cards(played_games, played_cards)
+
+        values = np.where(play, TYPE_VALUE[cards], -2)
+        reverse = values == REVERSE
+        self.directions[reverse] *= -1
+        next_players = (players + self.directions) % self.num_players
+
+        draw2 = values == DRAW2
+        draw4 = play & (cards == WILD_DRAW4)
+        self.draw_cards(games[draw2], next_players[draw2], 2)
+        self.draw_cards(games[draw4], next_players[draw4], 4)
+
+        skip = draw2 | draw4 | (values == SKIP) | (reverse & (self.num_players == 2))
+        self.current_players = (players + self.directions * (1 + skip)) % self.num_players
+
+        # Belohnung wie UnoGame.calculate_reward
+        hand_sizes = self.hands[games, players].sum(axis=1)
+        rewards = np.where(play, 7.0, -1.0)
+        rewards += 3 * (draw2 | draw4) + 2 * ((values == SKIP) | reverse)
+        rewards += play * (50 * (hand_sizes == 0) + 10 * (hand_sizes == 1))
+        dones = play & (hand_sizes == 0)
+
+        next_states = self.encode_states()
+        next_valid = (self.valid_action_mask() @ NN_PROJECTION) > 0
+        self.reset_games(games[dones])
+        nn_actions = np.where(play, NN_INDEX[cards], -1)
+        return states, nn_actions, rewards.astype(np.float32), next_states, dones, next_valid
+
+
+def evaluate_against_random(q_function, num_games=200, num_players=2, seed=None):
+    """ Anteil der Partien, die Spieler 0 mit greedy-Strategie gegen zufällig spielende Gegner gewinnt. """
+    env = VectorizedUnoEnv(min(num_games, 64), num_players, seed)
+    wins = finished = 0
+    while finished < num_games:
+        states = env.encode_states()
+        players = env.current_players.copy()
+        actions = np.where(players == 0, env.select_actions(states, q_function),
+                           env.select_actions(states, q_function, epsilon=1.0))
+        dones = env.step(actions)[4]
+        wins += int((dones & (players == 0)).sum())
+        finished += int(dones.sum())
+    return wins / finished
+
+
+def benchmark_training(modes=None, target_win_rate=0.6, eval_every=50, max_episodes=3000, eval_games=400,
+                       num_games=32):
+    """
+        Vergleicht Trainingsvarianten: Wie viele Episoden braucht jede, bis sie gegen einen
+        Zufallsspieler die Gewinnquote target_win_rate erreicht? Zufall gegen Zufall liegt bei 0.5.
+
+        Args:
+            modes (dict): Name -> Keyword-Argumente für NeuralNet. Standard: ohne Zielnetz,
+                          mit Zielnetz und Double DQN.
+    """
+    modes = modes or {
+        'online': {'target_update_every': 0},
+        'target': {'target_update_every': 100},
+        'double': {'target_update_every': 100, 'double_dqn': True},
+    }
+    results = {}
+    for name, options in modes.items():
+        game = UnoGame(num_players=2)
+        game.nn = NeuralNet(game.state_size, **options)
+        episodes = 0
+        win_rate = evaluate_against_random(game.nn.predict_q_values, eval_games, seed=0)
+        while win_rate < target_win_rate and episodes < max_episodes:
+            game.train_parallel(num_episodes=eval_every, num_games=num_games, save_every=10 ** 9)
+            episodes += eval_every
+            win_rate = evaluate_against_random(game.nn.predict_q_values, eval_games, seed=0)
+            verbose_print(f"{name}: {episodes} episodes, win rate {win_rate:.2f}")
+        results[name] = {'episodes': episodes if win_rate >= target_win_rate else None, 'win_rate': win_rate}
+        print(f"{name}: {results[name]}")
+    return results
+
+
+class NumpyQNet:
+    """
+        Forward-Pass des Dense-Netzes in reinem NumPy. Für die Inferenz im Bot und in den
+        Self-Play-Prozessen, die dafür kein TensorFlow laden müssen.
+    """
+
+    ACTIVATIONS = {
+        'relu': lambda x: np.maximum(x, 0, out=x),
+        'linear': lambda x: x,
+    }
+
+    def __init__(self, weights, activations=None):
+        self.kernels = [np.asarray(w, dtype=np.float32) for w in weights[0::2]]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in weights[1::2]]
+        # Wie NeuralNet.build_model: ReLU in den versteckten Schichten, linearer Ausgang
+        self.activations = list(activations or ['relu'] * (len(self.kernels) - 1) + ['linear'])
+        self.input_size = self.kernels[0].shape[0]
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(model.get_weights(), [layer.get_config()['activation'] for layer in model.layers])
+
+    @classmethod
+    def load(cls, filename='uno_model.npz'):
+        with np.load(filename) as data:
+            count = len(data['activations'])
+            weights = []
+            for i in range(count):
+                weights += [data[f'kernel_{i}'], data[f'bias_{i}']]
+            return cls(weights, [str(activation) for activation in data['activations']])
+
+    def save(self, filename='uno_model.npz'):
+        arrays = {'activations': np.array(self.activations)}
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+        np.savez(filename, **arrays)
+
+    def __call__(self, batch):
+        """ Q-Werte für eine (n, input_size)-Matrix von Zustand-Aktions-Paaren. """
+        x = np.asarray(batch, dtype=np.float32)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            x = self.ACTIVATIONS[activation](x @ kernel + bias)
+        return x[:, 0]
+
+
+def export_numpy_model(model_filename='uno_model.keras', filename='uno_model.npz'):
+    """ Exportiert die Gewichte eines gespeicherten Keras-Modells für NumpyQNet. """
+    from tensorflow.keras.models import load_model
+
+    NumpyQNet.from_model(load_model(model_filename, compile=False)).save(filename)
+    verbose_print(f"Exported {model_filename} to {filename}")
+
+
+def check_numpy_equivalence(model_filename='uno_model.keras', num_samples=1000, rtol=1e-5, atol=1e-4):
+    """ Vergleicht NumpyQNet mit Keras auf zufälligen Zustand-Aktions-Paaren, gibt die größte Abweichung zurück. """
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_filename, compile=False)
+    net = NumpyQNet.from_model(model)
+    rng = np.random.default_rng(0)
+    batch = np.zeros((num_samples, net.input_size), dtype=np.float32)
+    batch[:, :156] = rng.integers(0, 4, size=(num_samples, 156))
+    batch[np.arange(num_samples), 156 + rng.integers(0, 52, size=num_samples)] = 1
+
+    numpy_values = net(batch)
+    keras_values = model(batch, training=False).numpy()[:, 0]
+    difference = float(np.abs(numpy_values - keras_values).max())
+    # Unterschiedliche Summationsreihenfolge, float32-Rundung wächst mit der Größe der Q-Werte
+    if not np.allclose(numpy_values, keras_values, rtol=rtol, atol=atol):
+        raise AssertionError(f"NumpyQNet differs from Keras by {difference}")
+    print(f"NumpyQNet matches Keras, max difference {difference:.2e}")
+    return difference
+
+
+def benchmark_inference(model_filename='uno_model.keras', batch_sizes=(1, 8, 64, 512), repeats=200):
+    """ Misst die Latenz pro Aufruf von NumpyQNet, dem kompilierten tf.function-Pfad und model.predict. """
+    import time
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_filename, compile=False)
+    net = NumpyQNet.from_model(model)
+    q_function = tf.function(lambda batch: model(batch, training=False)[:, 0], reduce_retracing=True)
+    runners = {
+        'numpy': net,
+        'tf.function': lambda batch: q_function(batch).numpy(),
+        'predict': lambda batch: model.predict(batch, verbose=0),
+    }
+
+    results = {}
+    for batch_size in batch_sizes:
+        batch = np.random.default_rng(0).random((batch_size, net.input_size), dtype=np.float32)
+        for name, run in runners.items():
+            run(batch)  # Aufwärmen (Tracing)
+            count = repeats if name != 'predict' else max(repeats // 10, 1)
+            start = time.perf_counter()
+            for _ in range(count):
+                run(batch)
+            results[name, batch_size] = (time.perf_counter() - start) / count
+            print(f"{name:12} batch {batch_size:4}: {results[name, batch_size] * 1e6:9.1f} us")
+    return results
+
+
+def self_play_worker(weights, num_games, num_steps, epsilon, num_players=2, seed=None):
+    """
+        Läuft in einem eigenen Prozess ohne TensorFlow und gibt die gesammelten Erfahrungen
+        sowie die Anzahl beendeter Partien zurück.
+    """
+    env = VectorizedUnoEnv(num_games, num_players, seed)
+    q_function = NumpyQNet(weights)
+    transitions = []
+    finished = 0
+    for _ in range(num_steps):
+        states = env.encode_states()
+        transition = env.step(env.select_actions(states, q_function, epsilon))
+        transitions.append(transition)
+        finished += int(transition[4].sum())
+    return [np.concatenate(field) for field in zip(*transitions)], finished
+
+
+class ReplayMemory:
+    """ Ringpuffer für Erfahrungen in vorab allokierten NumPy-Arrays statt einer deque von Tupeln. """
+
+    FIELDS = ("states", "actions", "rewards", "next_states", "dones", "next_valid")
+
+    def __init__(self, capacity, state_size=156):
+        self.capacity = capacity
+        # Zustände bestehen nur aus kleinen Kartenzählern, uint8 braucht ein Viertel des Speichers von float32
+        self.states = np.zeros((capacity, state_size), dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int8)  # Kartenindex, -1 für "Karte ziehen"
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.uint8)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.next_valid = np.zeros((capacity, 52), dtype=np.bool_)  # Gültige Aktionen im Folgezustand
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, *transition):
+        """ Überschreibt bei vollem Puffer die älteste Erfahrung. """
+        for field, value in zip(self.FIELDS, transition):
+            getattr(self, field)[self.position] = value
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, *transitions):
+        """ Speichert viele Erfahrungen auf einmal, z. B. einen Schritt aller parallelen Partien. """
+        count = min(len(transitions[0]), self.capacity)
+        indices = (self.position + np.arange(count)) % self.capacity
+        for field, values in zip(self.FIELDS, transitions):
+            getattr(self, field)[indices] = values[-count:]
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def sample(self, batch_size):
+        """ Zieht zufällige Indizes, die Kosten hängen nicht von der Größe des Speichers ab. """
+        indices = np.random.randint(0, self.size, size=batch_size)
+        return tuple(getattr(self, field)[indices] for field in self.FIELDS)
+
+    def snapshot(self):
+        """ Kopie des belegten Teils in zeitlicher Reihenfolge, die älteste Erfahrung zuerst. """
+        order = (np.arange(self.size) + self.position - self.size) % self.capacity
+        return {field: getattr(self, field)[order] for field in self.FIELDS}
+
+    @staticmethod
+    def write(arrays, path):
+        """
+            Schreibt jedes Feld als eigene .npy-Datei in das Verzeichnis path. Das Verzeichnis wird
+            erst vollständig daneben geschrieben und dann ausgetauscht, ein Abbruch hinterlässt nie
+            einen halben Speicherstand.
+        """
+        tmp_path, old_path = f"{path}.tmp", f"{path}.old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for field, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{field}.npy"), array)
+        if os.path.exists(path):
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def save(self, path):
+        self.write(self.snapshot(), path)
+
+    def load(self, path):
+        """
+            Lädt einen mit save geschriebenen Speicherstand. Die Dateien werden nur memory-mapped
+            gelesen und in die eigenen Arrays kopiert, sonst bliebe das Verzeichnis geöffnet und
+            write könnte es (unter Windows) nicht ersetzen.
+        """
+        if not os.path.exists(path) and os.path.exists(f"{path}.old"):
+            path = f"{path}.old"  # Abbruch zwischen den beiden Umbenennungen
+        arrays = {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode='r') for field in self.FIELDS}
+        count = min(len(arrays['rewards']), self.capacity)
+        for field, array in arrays.items():
+            getattr(self, field)[:count] = array[len(array) - count:]
+        del arrays  # Schließt die Memory-Maps
+        self.size = count
+        self.position = count % self.capacity
+
+
+class Checkpointer:
+    """
+        Schreibt Checkpoints in einem Hintergrund-Thread, damit das Training nicht auf die Platte
+        wartet. Im Trainings-Thread werden nur Gewichte und Replay-Memory kopiert, jede Datei wird
+        atomar per os.replace ersetzt.
+    """
+
+    def __init__(self, net):
+        self.net = net
+        self.shadow_model = None  # Wird nur im Hintergrund-Thread benutzt
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="uno-checkpoint")
+        self.pending = None
+
+    def save(self, episode, model_filename='uno_model.keras', progress_filename='trainingProgress.json',
+             experience_path='uno_experience_memory'):
+        """ Startet einen Checkpoint. Läuft der vorherige noch, wird dieser übersprungen. """
+        if self.pending is not None:
+            if not self.pending.done():
+                verbose_print("Previous checkpoint still running, skipping.")
+                return False
+            if self.pending.exception():
+                verbose_print(f"Checkpoint failed: {self.pending.exception()}")
+
+        if self.shadow_model is None:
+            self.shadow_model = self.net.build_model()
+        weights = self.net.model.get_weights()
+        experience = self.net.memory.snapshot() if experience_path else None
+        self.pending = self.executor.submit(self.write, weights, self.net.epsilon, episode, experience,
+                                            model_filename, progress_filename, experience_path)
+        return True
+
+    def write(self, weights, epsilon, episode, experience, model_filename, progress_filename, experience_path):
+        self.shadow_model.set_weights(weights)
+        root, extension = os.path.splitext(model_filename)
+        tmp_filename = f"{root}.tmp{extension}"  # Keras verlangt die Endung .keras
+        self.shadow_model.save(tmp_filename)
+        os.replace(tmp_filename, model_filename)
+
+        if experience is not None:
+            ReplayMemory.write(experience, experience_path)
+        NeuralNet.save_progress(epsilon, episode, progress_filename)
+
+    def wait(self):
+        """ Wartet auf den laufenden Checkpoint und gibt dessen Fehler weiter. """
+        if self.pending is not None:
+            self.pending.result()
+
+
 class NeuralNet:
     def __init__(self, input_size, memory_size=2000, gamma=0.95, epsilon=1.0, epsilon_min=0.01, epsilon_decay=0.995,
-                 learning_rate=0.001):
-        self.memory = deque(maxlen=memory_size)
+                 learning_rate=0.001, target_update_every=100, double_dqn=False):
+        self.memory = ReplayMemory(memory_size, input_size - 52)
         self.gamma = gamma
         self.epsilon = epsilon
         self.epsilon_min = epsilon_min
@@ -184,8 +763,27 @@ class NeuralNet:
         self.learning_rate = learning_rate
         self.input_size = input_size
         self.model = self.build_model()
+        self.checkpointer = Checkpointer(self)
+        self.q_function = self.build_q_function(self.model)
+
+        # Zielnetz für die Bootstrap-Werte, wird alle target_update_every Trainingsschritte synchronisiert.
+        # Mit 0 bootstrappt das trainierte Netz sich selbst.
+        self.target_update_every = target_update_every
+        self.double_dqn = double_dqn
+        self.train_steps = 0
+        if target_update_every:
+            self.target_model = self.build_model()
+            self.target_q_function = self.build_q_function(self.target_model)
+            self.update_target_network()
+        else:
+            self.target_model = self.model
+            self.target_q_function = self.q_function
 
     def build_model(self):
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, Input
+        from tensorflow.keras.optimizers import Adam
+
         model = Sequential([
             Input(shape=(self.input_size,)),
             Dense(256, activation='relu'),
@@ -196,9 +794,33 @@ class NeuralNet:
         model.compile(loss='mse', optimizer=Adam(learning_rate=self.learning_rate))
         return model
 
-    def memorize(self, state, action, reward, next_state, done):
-        """ Speichert Erfahrungen im Replay-Speicher. """
-        self.memory.append((state, action, reward, next_state, done))
+    def build_q_function(self, model):
+        """ Kompiliert den Forward-Pass als Graph, ohne den Overhead von model.predict pro Aufruf. """
+        import tensorflow as tf
+
+        @tf.function(input_signature=[tf.TensorSpec([None, self.input_size], tf.float32)],
+                     reduce_retracing=True)
+        def q_function(batch):
+            return model(batch, training=False)[:, 0]
+
+        return q_function
+
+    def predict_q_values(self, batch):
+        """ Berechnet die Q-Werte für einen ganzen Batch von Zustand-Aktions-Paaren in einem Aufruf. """
+        return self.q_function(np.asarray(batch, dtype=np.float32)).numpy()
+
+    def predict_target_q_values(self, batch):
+        return self.target_q_function(np.asarray(batch, dtype=np.float32)).numpy()
+
+    def update_target_network(self):
+        """ Kopiert die aktuellen Gewichte ins Zielnetz. """
+        if self.target_model is not self.model:
+            self.target_model.set_weights(self.model.get_weights())
+
+    def memorize(self, state, action, reward, next_state, done, next_valid):
+        """ Speichert Erfahrungen im Replay-Speicher, next_valid ist die Maske der danach gültigen Aktionen. """
+        action_index = -1 if action is None else self.get_card_index(action)
+        self.memory.append(state, action_index, reward, next_state, done, next_valid)
 
     def act(self, state, valid_actions):
         """ Führt eine Aktion basierend auf dem gegebenen Zustand aus, wobei Exploration gegen Exploitation abgewogen wird. """
@@ -208,14 +830,57 @@ class NeuralNet:
         if np.random.rand() <= self.epsilon:
             return random.choice(valid_actions)
 
-        act_values = []
-        for action in valid_actions:
-            state_action_pair = self.get_state_action_pair(state, action)
-            prediction = self.model.predict(state_action_pair, verbose=0)[0]
-            act_values.append(prediction[0])
-
+        act_values = self.predict_q_values(self.get_state_action_batch(state, valid_actions))
         return valid_actions[np.argmax(act_values)]
 
+    def get_state_action_batch(self, state, actions):
+        """ Baut eine (n_actions, input_size)-Matrix aus einem Zustand und mehreren Aktionen. """
+        state_size = state.shape[1]
+        batch = np.zeros((len(actions), self.input_size), dtype=np.float32)
+        batch[:, :state_size] = state
+        for row, action in enumerate(actions):
+            if action is not None:
+                batch[row, state_size + self.get_card_index(action)] = 1
+        return batch
+
+    def get_state_action_rows(self, states, action_indices):
+        """ Hängt an jeden Zustand seine als One-Hot kodierte Aktion an (Index -1 bleibt leer). """
+        batch = np.zeros((len(states), self.input_size), dtype=np.float32)
+        state_size = states.shape[1]
+        batch[:, :state_size] = states
+        played = action_indices >= 0
+        batch[np.flatnonzero(played), state_size + action_indices[played].astype(np.int64)] = 1
+        return batch
+
+    def next_state_values(self, next_states, next_valid):
+        """
+            Berechnet max_a' Q(s', a') über die gültigen Aktionen aller Folgezustände in einem Aufruf.
+            Ohne gültige Karte bleibt nur das Ziehen. Mit double_dqn wählt das trainierte Netz die
+            Aktion und das Zielnetz bewertet sie.
+        """
+        draw_only = ~next_valid.any(axis=1, keepdims=True)
+        rows, options = np.nonzero(np.concatenate([next_valid, draw_only], axis=1))
+        batch = self.get_state_action_rows(next_states[rows], np.where(options == 52, -1, options))
+        target_values = self.predict_target_q_values(batch)
+
+        if self.double_dqn:
+            online_values = self.predict_q_values(batch)
+            order = np.lexsort((-online_values, rows))
+            _, first = np.unique(rows[order], return_index=True)
+            return target_values[order][first]
+
+        values = np.full(len(next_states), -np.inf, dtype=np.float32)
+        np.maximum.at(values, rows, target_values)
+        return values
+
+    def valid_action_mask(self, hand, top_card):
+        """ Maske der spielbaren Karten einer Hand im Index des Netzes. """
+        mask = np.zeros(52, dtype=np.bool_)
+        for card in hand:
+            if top_card is None or card.is_playable_on(top_card):
+                mask[card.index] = True
+        return mask
+
     def get_state_action_pair(self, state, action):
         """ Kombiniert den Zustandsvektor mit einem kodierten Aktionsvektor. """
         action_vector = self.encode_action(action)
@@ -231,29 +896,26 @@ class NeuralNet:
     @staticmethod
     def get_card_index(card):
         """ Gibt den Index einer Karte in einem Vektor zurück. """
-        colors = ["Rot", "Gelb", "Grün", "Blau"]
-        values = ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "Aussetzen", "Richtungswechsel", "+2"]
-        if card.value in ["Wild", "+4"]:
-            return 48 + ["Wild", "+4"].index(card.value)
-        return colors.index(card.color) * 12 + values.index(card.value)
+        return card.index
 
     def replay(self, batch_size):
         """ Trainiert das Model durch erneuten Einsatz von Erfahrungen im Speicher. """
         if len(self.memory) < batch_size:
             return
 
-        minibatch = random.sample(self.memory, batch_size)
-        for index, (state, action, reward, next_state, done) in enumerate(minibatch):
-            target = reward
-            if not done:
-                next_state_action = self.get_state_action_pair(next_state, action)
-                target = reward + self.gamma * self.model.predict(next_state_action, verbose=0)[0][0]
+        states, actions, rewards, next_states, dones, next_valid = self.memory.sample(batch_size)
+        state_actions = self.get_state_action_rows(states, actions)
+
+        # Ein Forward-Pass für alle Bootstrap-Werte und ein Trainingsschritt für den ganzen Batch
+        targets = rewards + self.gamma * self.next_state_values(next_states, next_valid) * ~dones
+        self.model.train_on_batch(state_actions, targets)
 
-            target_f = self.model.predict(self.get_state_action_pair(state, action), verbose=0)
-            target_f[0][0] = target
-            self.model.fit(self.get_state_action_pair(state, action), target_f, epochs=1, verbose=0)
+        self.train_steps += 1
+        if self.target_update_every and self.train_steps % self.target_update_every == 0:
+            self.update_target_network()
 
-            verbose_print(f"Replay Step {index + 1}: State: {state}, Action: {action}, Reward: {reward}, Target: {target}")
+        verbose_print(f"Replay: {batch_size} samples, mean reward {rewards.mean():.2f}, "
+                      f"mean target {targets.mean():.2f}")
 
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
@@ -263,27 +925,31 @@ class NeuralNet:
         self.model.save(filename)
         verbose_print(f"Model saved to {filename}")
 
-    def save_experience(self, filename='uno_experience_memory.pkl'):
-        """ Speichert den Replay-Memory in einer Datei. """
-        with open(filename, 'wb') as f:
-            pickle.dump(self.memory, f)
+    def export_numpy(self, filename='uno_model.npz'):
+        """ Speichert die Gewichte für NumpyQNet, das ohne TensorFlow auskommt. """
+        NumpyQNet.from_model(self.model).save(filename)
+        verbose_print(f"Model exported to {filename}")
+
+    def save_experience(self, filename='uno_experience_memory'):
+        """ Speichert den Replay-Memory als Verzeichnis mit einer .npy-Datei pro Feld. """
+        self.memory.save(filename)
         verbose_print(f"Experience memory saved to {filename}")
 
-    def load_experience(self, filename='uno_experience_memory.pkl'):
-        """ Lädt den Replay-Memory von einer Datei. """
+    def load_experience(self, filename='uno_experience_memory'):
+        """ Lädt den Replay-Memory aus einem Verzeichnis, ein fehlender oder kaputter Stand wird ignoriert. """
         try:
-            with open(filename, 'rb') as f:
-                self.memory = pickle.load(f)
+            self.memory.load(filename)
             verbose_print(f"Experience memory loaded from {filename}")
-        except FileNotFoundError:
-            verbose_print(f"No experience memory file found at {filename}, starting fresh.")
+        except (OSError, ValueError) as e:
+            verbose_print(f"Could not load experience memory from {filename} ({e}), starting fresh.")
 
     @staticmethod
     def save_progress(epsilon, episode, filename='trainingProgress.json'):
         """ Speichert den Fortschritt des Trainings als JSON. """
         progress = {'epsilon': epsilon, 'episode': episode}
-        with open(filename, 'w') as f:
+        with open(f"{filename}.tmp", 'w') as f:
             json.dump(progress, f)
+        os.replace(f"{filename}.tmp", filename)
         verbose_print(f"Progress saved to {filename}")
 
 
@@ -292,9 +958,20 @@ class UnoGame:
         self.num_players = num_players
         self.reset_game()
         self.state_size = 208  # 156 (state) + 52 (action)
-        self.nn = NeuralNet(self.state_size)
+        self._nn = None
         self.card_extractor = CardExtractor()
 
+    @property
+    def nn(self):
+        """ Das Netz lädt TensorFlow und wird deshalb erst bei der ersten Benutzung gebaut. """
+        if self._nn is None:
+            self._nn = NeuralNet(self.state_size)
+        return self._nn
+
+    @nn.setter
+    def nn(self, value):
+        self._nn = value
+
     def extract_cards_from_image(self, image_path):
         try:
             extracted_cards = self.card_extractor.extract_cards(image_path)
@@ -310,17 +987,22 @@ class UnoGame:
         self.discard_pile = []
         self.current_player = 0
         self.direction = 1
+        # Kartenzähler pro Eingang des Netzes, werden bei jeder Kartenbewegung mitgeführt
+        self.hand_vectors = np.zeros((self.num_players, 52), dtype=np.float32)
+        self.discard_vector = np.zeros(52, dtype=np.float32)
         self.deal_starting_hands()
         initial_card = self.deck.draw_card()
         if initial_card:
             self.discard_pile.append(initial_card)
+            self.discard_vector[initial_card.index] += 1
 
     def deal_starting_hands(self):
         for _ in range(7):
-            for player in self.players:
+            for player_idx, player in enumerate(self.players):
                 card = self.deck.draw_card()
                 if card:
                     player.append(card)
+                    self.hand_vectors[player_idx, card.index] += 1
 
     def draw_cards(self, player_idx, count):
         drawn_cards = []
@@ -330,15 +1012,20 @@ class UnoGame:
                 drawn_cards.append(card)
             elif len(self.discard_pile) > 1:
                 self.deck.shuffle_discard_pile_into_deck(self.discard_pile)
+                self.discard_vector[:] = 0
+                self.discard_vector[self.discard_pile[-1].index] = 1
                 card = self.deck.draw_card()
                 if card:
                     drawn_cards.append(card)
         self.players[player_idx].extend(drawn_cards)
+        for card in drawn_cards:
+            self.hand_vectors[player_idx, card.index] += 1
         return drawn_cards
 
     def play_card(self, player_idx, card, training_mode=False):
         if card in self.players[player_idx]:
             self.players[player_idx].remove(card)
+            self.hand_vectors[player_idx, card.index] -= 1
             if card.color is None:
                 if player_idx == 0 and not training_mode:  # Menschlicher Spieler
                     card.color = self.choose_color()
@@ -347,6 +1034,7 @@ class UnoGame:
                 verbose_print(f"Player {player_idx} played a wildcard. New color: {card.color}")
 
             self.discard_pile.append(card)  # Karte auf den Ablagestapel legen
+            self.discard_vector[card.index] += 1
 
             if card.value == "+2":
                 next_player = (player_idx + self.direction) % self.num_players
@@ -385,21 +1073,12 @@ class UnoGame:
                 verbose_print("Ungültige Eingabe. Bitte eine Zahl eingeben.")
 
     def encode_state(self):
-        state = np.zeros((1, 156))
-
-        # Encode player's hand
-        for card in self.players[self.current_player]:
-            state[0, self.nn.get_card_index(card)] += 1
-
-        # Encode top card
+        """ Setzt den Zustand aus den mitgeführten Zählern zusammen, unabhängig von der Größe der Stapel. """
+        state = np.zeros((1, 156), dtype=np.float32)
+        state[0, :52] = self.hand_vectors[self.current_player]
         if self.discard_pile:
-            top_card_idx = self.nn.get_card_index(self.discard_pile[-1])
-            state[0, 52 + top_card_idx] = 1
-
-        # Encode discard pile
-        for card in self.discard_pile:
-            state[0, 104 + self.nn.get_card_index(card)] += 1
-
+            state[0, 52 + self.discard_pile[-1].index] = 1
+        state[0, 104:] = self.discard_vector
         return state
 
     def get_valid_actions(self):
@@ -478,14 +1157,14 @@ class UnoGame:
                 old_state, action, reward, new_state, done = self.step(action, training_mode=True)
                 total_reward += reward
 
-                self.nn.memorize(old_state, action, reward, new_state, done)
+                next_valid = self.nn.valid_action_mask(self.players[self.current_player], self.discard_pile[-1])
+                self.nn.memorize(old_state, action, reward, new_state, done, next_valid)
                 self.nn.replay(batch_size)
 
                 total_steps += 1
 
                 if total_steps % save_every == 0:
-                    self.nn.save_model()
-                    NeuralNet.save_progress(self.nn.epsilon, episode)
+                    self.nn.checkpointer.save(episode)
 
                 if done:
                     break
@@ -493,6 +1172,62 @@ class UnoGame:
             if episode % 100 == 0:
                 verbose_print(f"Episode: {episode}, Total Reward: {total_reward}, Epsilon: {self.nn.epsilon:.2f}")
 
+        self.nn.checkpointer.wait()
+
+    def train_parallel(self, num_episodes=1000, num_games=32, batch_size=32, save_every=100, processes=0,
+                       steps_per_worker=100):
+        """
+            Trainiert mit vielen gleichzeitig laufenden Partien in einer VectorizedUnoEnv.
+
+            Args:
+                num_games (int): Anzahl paralleler Partien (pro Prozess, falls processes > 0).
+                processes (int): Anzahl Prozesse für Self-Play. Die Prozesse spielen mit einer
+                                 NumPy-Kopie der aktuellen Gewichte, trainiert wird im Hauptprozess.
+                steps_per_worker (int): Schritte, die jeder Prozess pro Runde spielt.
+        """
+        finished = 0
+        rounds = 0
+        if processes:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn statt fork, ein geforktes TensorFlow ist nicht stabil
+            with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+                while finished < num_episodes:
+                    weights = self.nn.model.get_weights()
+                    futures = [
+                        pool.submit(self_play_worker, weights, num_games, steps_per_worker, self.nn.epsilon,
+                                    self.num_players, random.getrandbits(32))
+                        for _ in range(processes)
+                    ]
+                    for future in futures:
+                        transitions, worker_finished = future.result()
+                        self.nn.memory.extend(*transitions)
+                        finished += worker_finished
+                        # So viele Trainingsschritte wie Schritte pro Partie gespielt wurden
+                        for _ in range(steps_per_worker):
+                            self.nn.replay(batch_size)
+                    rounds += 1
+                    self.save_parallel_progress(rounds, save_every, finished)
+            self.nn.checkpointer.wait()
+            return
+
+        env = VectorizedUnoEnv(num_games, self.num_players)
+        while finished < num_episodes:
+            states = env.encode_states()
+            transitions = env.step(env.select_actions(states, self.nn.predict_q_values, self.nn.epsilon))
+            self.nn.memory.extend(*transitions)
+            self.nn.replay(batch_size)
+            finished += int(transitions[4].sum())
+            rounds += 1
+            self.save_parallel_progress(rounds, save_every, finished)
+        self.nn.checkpointer.wait()
+
+    def save_parallel_progress(self, rounds, save_every, finished):
+        if rounds % save_every == 0:
+            self.nn.checkpointer.save(finished)
+            verbose_print(f"Finished games: {finished}, Epsilon: {self.nn.epsilon:.2f}")
+
     def play_game(self, verbose=True):
         self.reset_game()
 
@@ -584,7 +1319,7 @@ if __name__ == "__main__":
     game = UnoGame(num_players=2)
 
     # Laden der gespeicherten Erfahrungen, falls vorhanden
-    #game.nn.load_experience('uno_experience_memory.pkl')
+    #game.nn.load_experience('uno_experience_memory')
 
     # Extract cards before starting the game
     #game.extract_cards_from_image('uno_set.png')
@@ -592,8 +1327,19 @@ if __name__ == "__main__":
     # Uncomment to train the AI
     game.train(num_episodes=10, batch_size=32, save_every=10)
 
+    # Alternativ: viele Partien parallel, optional auf mehrere Prozesse verteilt
+    #game.train_parallel(num_episodes=1000, num_games=32, processes=4)
+
+    # Episoden bis zur Ziel-Gewinnquote gegen Zufall vergleichen (ohne Zielnetz, mit Zielnetz, Double DQN)
+    #benchmark_training(target_win_rate=0.6)
+
+    # Gewichte für die Inferenz ohne TensorFlow exportieren, prüfen und Latenz messen
+    #export_numpy_model('uno_model.keras', 'uno_model.npz')
+    #check_numpy_equivalence('uno_model.keras')
+    #benchmark_inference('uno_model.keras')
+
     # Start the game
     #game.play_uno_cmd()
 
     # Nach dem Spiel die Erfahrungen speichern
-    #game.nn.save_experience('uno_experience_memory.pkl')
+    #game.nn.save_experience('uno_experience_memory')
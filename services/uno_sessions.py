@@ -0,0 +1,194 @@
+import time
+import random
+import logging
+from collections import OrderedDict
+import numpy as np
+import discord
+from discord.ext import tasks
+import config
+from services import uno_service
+from services.uno_service import UnoGame, NumpyQNet
+
+logger = logging.getLogger(__name__)
+
+# Game output goes to Discord, not to the console
+uno_service.VERBOSE = False
+
+
+class UnoSession:
+    # One game in one channel. The human is always player 0, everyone else is the AI
+    def __init__(self, channel, user, num_players):
+        self.channel = channel
+        self.user = user
+        self.game = UnoGame(num_players)
+        self.last_active = time.monotonic()
+        self.ai_moves = []  # AI moves since the human's last turn
+
+    def is_ai_turn(self):
+        return self.game.current_player != 0 and self.game.check_winner() is None
+
+
+class UnoSessionService:
+    # Holds all running Uno games and plays the AI turns. Every tick, the AI moves of all
+    # games are scored in one NumpyQNet call, so many games cost about as much as one.
+    def __init__(self, bot):
+        self.bot = bot
+        # Channel id -> UnoSession, least recently active first
+        self.sessions = OrderedDict()
+        self.net = None
+        self.net_loaded = False
+
+    async def start(self):
+        self.tick.start()
+
+    def get(self, channel_id):
+        # Counts as activity, used for every human move
+        session = self.sessions.get(channel_id)
+        if session:
+            session.last_active = time.monotonic()
+            self.sessions.move_to_end(channel_id)
+        return session
+
+    def create(self, channel, user, num_players):
+        # Returns the new session and the session ended to make room for it, if any
+        self.sessions.pop(channel.id, None)
+        evicted = None
+        if len(self.sessions) >= config.UNO_MAX_SESSIONS:
+            _, evicted = self.sessions.popitem(last=False)
+        session = UnoSession(channel, user, num_players)
+        self.sessions[channel.id] = session
+        return session, evicted
+
+    def end(self, session):
+        # Only this game, a new one may have been started in the channel meanwhile
+        if self.sessions.get(session.channel.id) is session:
+            del self.sessions[session.channel.id]
+
+    def load_net(self):
+        if not self.net_loaded:
+            self.net_loaded = True
+            try:
+                self.net = NumpyQNet.load(config.UNO_MODEL_PATH)
+            except FileNotFoundError:
+                logger.warning(
+                    f"No Uno model at {config.UNO_MODEL_PATH}, the AI plays random cards."
+                )
+        return self.net
+
+    @tasks.loop(seconds=1)
+    async def tick(self):
+        await self.evict_idle()
+
+        pending = [
+            session for session in self.sessions.values() if session.is_ai_turn()
+        ]
+        if not pending:
+            return
+
+        for session, action in zip(pending, self.choose_actions(pending)):
+            # Sending to the previous game can yield long enough for this one to be
+            # quit or replaced, its move is no longer wanted then
+            if self.sessions.get(session.channel.id) is not session:
+                continue
+            game = session.game
+            player = game.current_player
+            game.step(action)
+            session.ai_moves.append(
+                f"AI {player} draws a card."
+                if action is None
+                else f"AI {player} plays **{action}**."
+            )
+
+            winner = game.check_winner()
+            if winner is not None:
+                self.end(session)
+                await self.send(
+                    session,
+                    "\n".join(session.ai_moves)
+                    + f"\nAI {winner} wins! Better luck next time.",
+                )
+            elif game.current_player == 0:
+                await self.send(session, format_turn(session))
+                session.ai_moves.clear()
+
+    @tick.before_loop
+    async def before_tick(self):
+        await self.bot.wait_until_ready()
+
+    def choose_actions(self, sessions):
+        # Scores the valid cards of every game in one batch and picks the best per game
+        net = self.load_net()
+        actions = [None] * len(sessions)
+        candidates = []  # (session index, valid cards, state)
+        for i, session in enumerate(sessions):
+            valid = session.game.get_valid_actions()
+            if not valid:
+                continue  # Draw a card
+            if net is None:
+                actions[i] = random.choice(valid)
+            else:
+                candidates.append((i, valid, session.game.encode_state()[0]))
+
+        if not candidates:
+            return actions
+
+        sizes = [len(valid) for _, valid, _ in candidates]
+        batch = np.zeros((sum(sizes), net.input_size), dtype=np.float32)
+        batch[:, :156] = np.repeat([state for _, _, state in candidates], sizes, axis=0)
+        card_indices = [card.index for _, valid, _ in candidates for card in valid]
+        batch[np.arange(len(batch)), 156 + np.array(card_indices)] = 1
+        q_values = net(batch)
+
+        offset = 0
+        for (i, valid, _), size in zip(candidates, sizes):
+            actions[i] = valid[int(np.argmax(q_values[offset : offset + size]))]
+            offset += size
+        return actions
+
+    async def evict_idle(self):
+        timeout = config.UNO_IDLE_TIMEOUT * 60
+        now = time.monotonic()
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if now - session.last_active < timeout:
+                break
+            self.end(session)
+            await self.send(
+                session,
+                f"Uno game of {session.user.mention} ended after "
+                f"{config.UNO_IDLE_TIMEOUT} minutes without a move.",
+            )
+
+    @staticmethod
+    async def send(session, message):
+        try:
+            await session.channel.send(message)
+        except discord.HTTPException as e:
+            logger.error(f"Error sending Uno update to {session.channel.id}: {e}")
+
+
+# Turn summary for the human: AI moves since the last turn, top card and hand
+def format_turn(session):
+    game = session.game
+    top_card = game.discard_pile[-1]
+    cards = [
+        (
+            f"**{number}: {card}**"
+            if card.is_playable_on(top_card)
+            else f"{number}: {card}"
+        )
+        for number, card in enumerate(game.players[0], start=1)
+    ]
+    opponents = ", ".join(
+        f"AI {player}: {len(hand)}"
+        for player, hand in enumerate(game.players)
+        if player
+    )
+    return "\n".join(
+        session.ai_moves
+        + [
+            f"{session.user.mention}, your turn. Top card: **{top_card}**",
+            f"Your hand (playable in bold): {', '.join(cards)}",
+            f"Cards left: {opponents}",
+        ]
+    )
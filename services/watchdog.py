@@ -0,0 +1,84 @@
+import time
+import threading
+import traceback
+import sys
+from collections import deque
+from datetime import datetime
+from discord.ext import tasks
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 0.1  # Seconds between heartbeats of the event loop
+MAX_STALLS = 20  # Number of recent stalls kept for /profiler
+
+
+class LoopWatchdog:
+    # The event loop beats regularly, a thread checks the beats. If one is overdue by
+    # more than WATCHDOG_THRESHOLD the loop is blocked, the thread then grabs the stack
+    # of the loop thread, which shows the code that is blocking it.
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_beat = time.monotonic()
+        self.loop_thread_id = None
+        self.reported_beat = None  # Beat of the stall whose stack was captured
+        self.stall = None  # Stall captured by the thread, completed by the next beat
+        self.stall_lock = threading.Lock()  # Guards stall and stalls across threads
+        self.stalls = deque(maxlen=MAX_STALLS)  # Dicts with time, duration, stack
+        self.stopping = threading.Event()
+        self.thread = None
+
+    async def start(self):
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.heartbeat.start()
+        self.thread = threading.Thread(
+            target=self.watch, name="loop-watchdog", daemon=True
+        )
+        self.thread.start()
+
+    async def stop(self):
+        self.stopping.set()
+        if self.thread:
+            self.thread.join()
+
+    @tasks.loop(seconds=HEARTBEAT_INTERVAL)
+    async def heartbeat(self):
+        now = time.monotonic()
+        with self.stall_lock:
+            stall, self.stall = self.stall, None
+            if stall is not None:
+                # The loop is running again, so the stall is over
+                stall["duration"] = now - self.last_beat - HEARTBEAT_INTERVAL
+                if stall["duration"] < config.WATCHDOG_THRESHOLD:
+                    # The loop beat right before the stack was taken, it was not blocked
+                    self.stalls.remove(stall)
+                    stall = None
+            self.last_beat = now
+        if stall is not None:
+            logger.warning(
+                f"Event loop was blocked for {stall['duration']:.2f}s in:\n"
+                f"{stall['stack']}"
+            )
+
+    def watch(self):
+        check_interval = config.WATCHDOG_THRESHOLD / 4
+        while not self.stopping.wait(check_interval):
+            last_beat = self.last_beat
+            overdue = time.monotonic() - last_beat - HEARTBEAT_INTERVAL
+            if overdue < config.WATCHDOG_THRESHOLD or self.reported_beat == last_beat:
+                continue
+
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            self.reported_beat = last_beat
+            stall = {
+                "time": datetime.now(),
+                "duration": None,  # Still blocked
+                "stack": "".join(traceback.format_stack(frame)),
+            }
+            with self.stall_lock:
+                self.stalls.append(stall)
+                self.stall = stall
@@ -0,0 +1,341 @@
+import os
+import json
+import zlib
+import shutil
+import struct
+import hashlib
+import asyncio
+from datetime import datetime
+from discord.ext import tasks
+import config
+from services.rcon_pool import RconPool
+from services.region_index import RegionFile, SECTOR_SIZE
+import logging
+
+logger = logging.getLogger(__name__)
+
+HEADER_SECTORS = 2  # Location table and timestamp table
+SKIPPED_FILES = {"session.lock"}
+
+
+# Whether the running server holds the world's session.lock, None if it can't be told
+def session_lock_held(world_path):
+    path = os.path.join(world_path, "session.lock")
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return False  # Created by the server on start, so it never ran on this world
+    except OSError:
+        return None
+    with f:
+        try:
+            # Java locks the file while the server runs, trying to lock it ourselves
+            # fails exactly then. Released again right away.
+            if os.name == "nt":
+                import msvcrt
+
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.lockf(f, fcntl.LOCK_UN)
+        except OSError:
+            return True
+    return False
+
+
+def object_hash(data):
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def build_region_file(chunks):
+    # Builds region file bytes from (index, timestamp, payload) tuples
+    locations = [0] * 1024
+    timestamps = [0] * 1024
+    body = bytearray()
+    for index, timestamp, payload in chunks:
+        record = struct.pack(">I", len(payload)) + payload
+        sectors = -(-len(record) // SECTOR_SIZE)
+        sector = HEADER_SECTORS + len(body) // SECTOR_SIZE
+        locations[index] = (sector << 8) | min(sectors, 255)
+        timestamps[index] = timestamp
+        body += record + bytes(sectors * SECTOR_SIZE - len(record))
+    header = struct.pack(">1024I", *locations) + struct.pack(">1024I", *timestamps)
+    return header + bytes(body)
+
+
+class WorldBackupStore:
+    # Content-addressed snapshot store. Region files are split into chunks so a
+    # chunk that did not change is stored once no matter how many snapshots use it.
+    def __init__(self, world_path, backup_path):
+        self.world_path = world_path
+        self.backup_path = backup_path
+        self.objects_path = os.path.join(backup_path, "objects")
+        self.snapshots_path = os.path.join(backup_path, "snapshots")
+        os.makedirs(self.objects_path, exist_ok=True)
+        os.makedirs(self.snapshots_path, exist_ok=True)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_path, digest[:2], digest)
+
+    def put_object(self, data):
+        # Stores data under its hash, returns (hash, whether it was new)
+        digest = object_hash(data)
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def get_object(self, digest):
+        with open(self.object_path(digest), "rb") as f:
+            return f.read()
+
+    def list_snapshots(self):
+        # Newest first
+        names = [f[:-5] for f in os.listdir(self.snapshots_path) if f.endswith(".json")]
+        return sorted(names, reverse=True)
+
+    def load_manifest(self, name):
+        with open(
+            os.path.join(self.snapshots_path, f"{name}.json"), "r", encoding="utf-8"
+        ) as f:
+            return json.load(f)
+
+    def snapshot(self):
+        # Creates a snapshot, only reading files that changed since the last one
+        snapshots = self.list_snapshots()
+        previous = self.load_manifest(snapshots[0])["files"] if snapshots else {}
+        files = {}
+        stats = {
+            "files": 0,
+            "reused": 0,
+            "changed_chunks": 0,
+            "new_objects": 0,
+            "new_bytes": 0,
+        }
+
+        for root, _, filenames in os.walk(self.world_path):
+            for filename in filenames:
+                if filename in SKIPPED_FILES:
+                    continue
+                path = os.path.join(root, filename)
+                relative_path = os.path.relpath(path, self.world_path).replace(
+                    os.sep, "/"
+                )
+                stat = os.stat(path)
+                stats["files"] += 1
+
+                previous_entry = previous.get(relative_path)
+                if (
+                    previous_entry
+                    and previous_entry["mtime"] == stat.st_mtime_ns
+                    and previous_entry["size"] == stat.st_size
+                ):
+                    files[relative_path] = previous_entry
+                    stats["reused"] += 1
+                    continue
+
+                entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+                if filename.endswith(".mca"):
+                    entry["type"] = "region"
+                    entry["chunks"] = self.snapshot_region(path, previous_entry, stats)
+                else:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    # Region chunks are compressed by the server, other files are not
+                    compressed = zlib.compress(data)
+                    entry["type"] = "file"
+                    entry["hash"], new = self.put_object(compressed)
+                    if new:
+                        stats["new_objects"] += 1
+                        stats["new_bytes"] += len(compressed)
+                files[relative_path] = entry
+
+        name = datetime.now().strftime("%Y%m%d-%H%M%S")
+        manifest = {"backup_date": name, "world": self.world_path, "files": files}
+        manifest_path = os.path.join(self.snapshots_path, f"{name}.json")
+        with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        return name, stats
+
+    def snapshot_region(self, path, previous_entry, stats):
+        # Chunks whose header timestamp did not change are taken from the previous
+        # snapshot without reading or hashing their data
+        known = {}
+        if previous_entry and previous_entry["type"] == "region":
+            known = {
+                index: (digest, timestamp)
+                for index, digest, timestamp in previous_entry["chunks"]
+            }
+
+        chunks = []
+        with RegionFile(path) as region:
+            timestamps = region.timestamps()
+            for index, (sector, _) in enumerate(region.locations()):
+                if not sector:
+                    continue
+                timestamp = timestamps[index]
+                if index in known and known[index][1] == timestamp:
+                    chunks.append([index, known[index][0], timestamp])
+                    continue
+
+                payload = region.chunk_payload(index, sector)
+                if payload is None:
+                    continue
+                stats["changed_chunks"] += 1
+                digest, new = self.put_object(payload)
+                chunks.append([index, digest, timestamp])
+                if new:
+                    stats["new_objects"] += 1
+                    stats["new_bytes"] += len(payload)
+        return chunks
+
+    def restore(self, name, target_path):
+        # Rebuilds a snapshot next to the target, then swaps it into place
+        manifest = self.load_manifest(name)
+        staging_path = f"{target_path}.restoring"
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+        for relative_path, entry in manifest["files"].items():
+            path = os.path.join(staging_path, *relative_path.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if entry["type"] == "region":
+                data = build_region_file(
+                    (index, timestamp, self.get_object(digest))
+                    for index, digest, timestamp in entry["chunks"]
+                )
+            else:
+                data = zlib.decompress(self.get_object(entry["hash"]))
+            with open(path, "wb") as f:
+                f.write(data)
+
+        if os.path.exists(target_path):
+            replaced_path = (
+                f"{target_path}.replaced-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            )
+            os.rename(target_path, replaced_path)
+            logger.info(f"Moved the current world to {replaced_path}")
+        os.rename(staging_path, target_path)
+
+    def rotate(self, keep):
+        # Deletes old snapshots and every object no remaining snapshot refers to
+        snapshots = self.list_snapshots()
+        for name in snapshots[keep:]:
+            os.remove(os.path.join(self.snapshots_path, f"{name}.json"))
+
+        referenced = set()
+        for name in snapshots[:keep]:
+            for entry in self.load_manifest(name)["files"].values():
+                if entry["type"] == "region":
+                    referenced.update(digest for _, digest, _ in entry["chunks"])
+                else:
+                    referenced.add(entry["hash"])
+
+        removed = 0
+        for root, _, filenames in os.walk(self.objects_path):
+            for filename in filenames:
+                if filename not in referenced:
+                    os.remove(os.path.join(root, filename))
+                    removed += 1
+        return removed
+
+
+class WorldBackupService:
+    dependencies = [RconPool]
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = None
+        self.lock = asyncio.Lock()  # Only one backup or restore at a time
+
+        if config.WORLD_PATH and os.path.isdir(config.WORLD_PATH):
+            self.store = WorldBackupStore(config.WORLD_PATH, config.WORLD_BACKUP_PATH)
+
+    async def start(self):
+        if self.store and config.WORLD_BACKUP_INTERVAL:
+            self.scheduled_backup.change_interval(hours=config.WORLD_BACKUP_INTERVAL)
+            self.scheduled_backup.start()
+
+    async def rcon(self, command):
+        # Returns None if the server is not running, the world is then safe to copy
+        try:
+            return await self.bot.services.get(RconPool).command(command)
+        except Exception as e:
+            logger.debug(f"RCON command {command!r} failed: {e}")
+            return None
+
+    async def server_stopped(self):
+        # Only a positive sign counts: the world's session.lock not being held, or the
+        # server refusing RCON connections. A wrong password or a timeout proves nothing.
+        held = await asyncio.to_thread(session_lock_held, config.WORLD_PATH)
+        if held is not None:
+            return not held
+
+        pool = self.bot.services.get(RconPool)
+        if not pool:
+            return False
+        try:
+            await pool.command("list")
+        except ConnectionRefusedError:
+            return True
+        except Exception as e:
+            logger.warning(f"Could not tell whether the server is running: {e}")
+        return False
+
+    async def create_backup(self):
+        async with self.lock:
+            online = await self.rcon("save-off") is not None
+            try:
+                if online:
+                    await self.rcon("save-all flush")
+                name, stats = await asyncio.to_thread(self.store.snapshot)
+            finally:
+                if online:
+                    await self.rcon("save-on")
+
+            removed = await asyncio.to_thread(
+                self.store.rotate, config.WORLD_BACKUP_KEEP
+            )
+            logger.info(
+                f"World snapshot {name}: {stats['files']} files, {stats['reused']} unchanged, "
+                f"{stats['changed_chunks']} changed chunks, "
+                f"{stats['new_objects']} new objects ({stats['new_bytes']} bytes), "
+                f"{removed} old objects removed."
+            )
+            return name, stats
+
+    async def restore_backup(self, name):
+        # Restoring under a running server would be overwritten on its next save
+        async with self.lock:
+            if not await self.server_stopped():
+                raise RuntimeError(
+                    "Stop the Minecraft server before restoring. If it is stopped, "
+                    "check RCON_PASSWORD and WORLD_PATH."
+                )
+            await asyncio.to_thread(self.store.restore, name, config.WORLD_PATH)
+
+    @tasks.loop(hours=6)  # Overwritten with config.WORLD_BACKUP_INTERVAL
+    async def scheduled_backup(self):
+        # The loop also fires on every start, skip it if the last snapshot is recent
+        snapshots = self.store.list_snapshots()
+        if snapshots:
+            age = datetime.now() - datetime.strptime(snapshots[0], "%Y%m%d-%H%M%S")
+            if age.total_seconds() < config.WORLD_BACKUP_INTERVAL * 3600:
+                return
+
+        try:
+            await self.create_backup()
+        except Exception as e:
+            logger.error(f"Error creating world backup: {e}")
+
+    @scheduled_backup.before_loop
+    async def before_scheduled_backup(self):
+        await self.bot.wait_until_ready()
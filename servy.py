@@ -1,11 +1,15 @@
 from datetime import datetime
 import discord
 import config
+import command_sync
+from service_registry import ServiceRegistry
 from discord.ext import commands
 import asyncio
 import os
 import importlib
 import inspect
+import time
+import ast
 
 
 # Discord bot setup with intents
@@ -13,34 +17,97 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+
+# Startup chunking and member cache flags for config.MEMBER_CACHE_MODE
+def member_cache_options(mode):
+    if mode == "full":
+        return {"chunk_guilds_at_startup": True}
+    if mode == "lazy":
+        return {"chunk_guilds_at_startup": False}
+    if mode == "seen":
+        flags = discord.MemberCacheFlags.none()
+        flags.voice = True  # /move needs the members of voice channels
+        return {"chunk_guilds_at_startup": False, "member_cache_flags": flags}
+    raise ValueError(f"Unknown MEMBER_CACHE_MODE: {mode}")
+
+
+bot = commands.Bot(
+    command_prefix="!",
+    intents=intents,
+    **member_cache_options(config.MEMBER_CACHE_MODE),
+)
+bot.services = ServiceRegistry(bot)  # Shared service instances, see get()
+
+
+# Seconds spent per module before connecting, printed once everything is loaded
+startup_profile = []
 
 
 # Generic function to load classes based on directory and __init__ parameters
 async def load_modules(directory):
-    for filename in os.listdir(directory):
+    service_classes = []
+
+    for filename in sorted(os.listdir(directory)):
         if not filename.endswith(".py"):
             continue
 
         module_name = filename[:-3]
-        module = importlib.import_module(f"{directory}.{module_name}")
 
-        for obj_name in dir(module):
-            obj = getattr(module, obj_name)
+        # Modules without a loadable class (e.g. uno_service, which pulls in TensorFlow)
+        # are not imported at startup but by whatever uses them first
+        class_names = scan_classes(os.path.join(directory, filename))
+        if not class_names:
+            continue
 
-            if not is_valid_class(obj, module):
-                continue
+        start = time.perf_counter()
+        if directory == "commands":
+            await bot.load_extension(f"{directory}.{module_name}")
+            print(f"Loaded command {module_name}")
+        elif directory == "services":
+            module = importlib.import_module(f"{directory}.{module_name}")
+            for obj_name in class_names:
+                obj = getattr(module, obj_name)
+
+                if not is_valid_class(obj, module) or not has_valid_init(obj):
+                    print(f"Skipping {obj_name}: invalid __init__ parameters")
+                    continue
+
+                service_classes.append(obj)
+        startup_profile.append(
+            (f"{directory}.{module_name}", time.perf_counter() - start)
+        )
+
+    if service_classes:
+        # Initialize services, dependencies first
+        start = time.perf_counter()
+        for obj_name in bot.services.create(service_classes):
+            print(f"Initialized service {obj_name}")
+        startup_profile.append(("service initialization", time.perf_counter() - start))
+
+
+# Find classes whose __init__ takes only 'self' and 'bot' without importing the module
+def scan_classes(path):
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    class_names = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for item in node.body:
+            if isinstance(item, ast.FunctionDef) and item.name == "__init__":
+                params = [arg.arg for arg in item.args.args]
+                if params == ["self", "bot"] and not item.args.vararg:
+                    class_names.append(node.name)
+    return class_names
 
-            if not has_valid_init(obj):
-                print(f"Skipping {obj_name}: invalid __init__ parameters")
-                continue
 
-            if directory == "commands":
-                await bot.load_extension(f"{directory}.{module_name}")
-                print(f"Loaded command {module_name}")
-            elif directory == "services":
-                obj(bot)  # Initialize service
-                print(f"Initialized service {obj_name}")
+def print_startup_profile(total):
+    # For a breakdown of the imports themselves run: python -X importtime servy.py
+    print(f"Startup took {total:.2f}s before connecting:")
+    for name, seconds in sorted(startup_profile, key=lambda x: x[1], reverse=True):
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
 
 
 # Check if the object is a valid class and belongs to the correct module
@@ -59,25 +126,39 @@ def has_valid_init(obj):
         return False
 
 
-# Event: Bot is ready
+# Runs once after logging in, before connecting to the gateway
 @bot.event
-async def on_ready():
-    print(f"Bot logged in as {bot.user} at {datetime.now().strftime('%H:%M:%S')}")
-
-    # Sync global commands
+async def setup_hook():
+    # Sync commands, skipped if nothing changed since the last sync
     try:
-        synced = await bot.tree.sync()  # Sync globally
-        print(f"Synced {len(synced)} commands globally")
+        synced = await command_sync.sync_commands(bot, config.DEV_GUILD_ID)
+        target = f"to guild {config.DEV_GUILD_ID}" if config.DEV_GUILD_ID else "globally"
+        if synced is None:
+            print(f"Commands unchanged, skipping sync {target}")
+        else:
+            print(f"Synced {len(synced)} commands {target}")
     except Exception as e:
         print(f"Error syncing commands: {e}")
 
 
+# Event: Bot is ready, also fires again after every reconnect
+@bot.event
+async def on_ready():
+    print(f"Bot logged in as {bot.user} at {datetime.now().strftime('%H:%M:%S')}")
+
+
 # Start the bot
 async def main():
     async with bot:
+        start = time.perf_counter()
         await load_modules("commands")
         await load_modules("services")
-        await bot.start(config.DISCORD_TOKEN)
+        await bot.services.start_all()
+        print_startup_profile(time.perf_counter() - start)
+        try:
+            await bot.start(config.DISCORD_TOKEN)
+        finally:
+            await bot.services.stop_all()
 
 
 # Run the bot